@@ -0,0 +1,71 @@
+"""Compare the peak memory of reading and parsing a large Solidity source
+with antlr4.FileStream and with CompactFileStream.
+
+Each measurement runs in a fresh interpreter and reports its peak RSS
+above the baseline after imports. Without arguments, an ASCII and a
+non-ASCII source of about 2MB are made from docs/example.sol::
+
+    python benchmarks/input_stream_rss.py
+    python benchmarks/input_stream_rss.py path/to/Large.sol
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.join(here, os.pardir)
+
+TARGET_SIZE = 2 * 1024 * 1024
+
+MEASURE = '''
+import resource, sys
+sys.path.insert(0, {root!r})
+from antlr4 import FileStream
+from sphinxcontrib.soliditydomain import sourceregistry
+from sphinxcontrib.soliditydomain.streams import CompactFileStream
+stream_class = FileStream if {old!r} else CompactFileStream
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if {parse!r}:
+    sourceregistry.CompactFileStream = stream_class
+    sourceregistry.parse_sol({path!r}, 'large.sol', skeleton=True)
+else:
+    stream = stream_class({path!r}, encoding='utf8')
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print((peak - base) / 1024)
+'''
+
+
+def measure(path, old, parse):
+    code = MEASURE.format(root=root, path=path, old=old, parse=parse)
+    return float(subprocess.check_output([sys.executable, '-c', code]))
+
+
+def make_sources(dirname):
+    with open(os.path.join(root, 'docs', 'example.sol'), encoding='utf8') as f:
+        example = f.read()
+    copies = TARGET_SIZE // len(example.encode('utf8')) + 1
+    sources = []
+    for name, extra in (('ascii.sol', ''),
+                        ('non-ascii.sol', '// Größe ≤ 10 → ok\n')):
+        path = os.path.join(dirname, name)
+        with open(path, 'w', encoding='utf8') as f:
+            f.write((extra + example) * copies)
+        sources.append(path)
+    return sources
+
+
+def main():
+    with tempfile.TemporaryDirectory() as dirname:
+        sources = sys.argv[1:] or make_sources(dirname)
+        print('{:<16} {:<10} {:>12} {:>18}'.format(
+            'source', 'measured', 'FileStream', 'CompactFileStream'))
+        for path in sources:
+            for parse in (False, True):
+                print('{:<16} {:<10} {:>10.1f}MB {:>16.1f}MB'.format(
+                    os.path.basename(path), 'parse_sol' if parse else 'stream',
+                    measure(path, True, parse), measure(path, False, parse)))
+
+
+if __name__ == '__main__':
+    main()
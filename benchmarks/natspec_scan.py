@@ -0,0 +1,78 @@
+"""Time scan_natspec against the tag_re expression it replaced.
+
+Reports the time per doc comment for a typical comment and for inputs
+built to provoke backtracking, then how the time grows with the input
+length for the worst of those::
+
+    python benchmarks/natspec_scan.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from sphinxcontrib.soliditydomain.natspec import scan_natspec
+
+tag_re = re.compile(
+    r''' @ (\w+)
+        \s+
+        ( [^@]+ (?: (?: (?<! \s) @ | @ \s) [^@]+)* )
+    ''',
+    re.VERBOSE | re.MULTILINE | re.DOTALL
+)
+
+CASES = (
+    ('typical comment, 6 tags',
+     '@title A simulator for trees\n'
+     '@author Larry A. Gardner\n'
+     '@notice You can use this contract for only the most basic '
+     'simulation\n'
+     '@dev All function calls are currently implemented without side '
+     'effects\n'
+     '@param rings The number of rings from dendrochronological sample\n'
+     '@return age in years, rounded up for partial years\n'),
+    ('2000 email addresses', '@dev contact ' + ' '.join(
+        'user{}@example.com'.format(i) for i in range(2000))),
+    ('2000 "x @ y" decorators', '@dev ' + ' '.join(
+        'x @ y' for i in range(2000))),
+    ('@dev a + 20000 @', '@dev a' + '@' * 20000),
+    ('@ + 20000 word chars', '@' + 'a' * 20000),
+    ('5000 failed tag starts', ' '.join('@' + 'a' * 8 for i in range(5000))),
+    ('2000 tags, 10-space gaps', ''.join('@a' + ' ' * 10 for i in range(2000))),
+)
+
+
+def scan_with_tag_re(text):
+    return list(tag_re.finditer(text)), tag_re.sub('', text)
+
+
+def best_time(func, text):
+    number = 2000 if len(text) < 1000 else 20
+    return min(timeit.repeat(
+        lambda: func(text), number=number, repeat=3)) / number
+
+
+def main():
+    print('{:<26} {:>7} {:>12} {:>12}'.format(
+        'input', 'chars', 'tag_re', 'scan_natspec'))
+    for name, text in CASES:
+        print('{:<26} {:>7} {:>10.1f}us {:>10.1f}us'.format(
+            name, len(text), best_time(scan_with_tag_re, text) * 1e6,
+            best_time(scan_natspec, text) * 1e6))
+
+    print()
+    print('time per char while doubling the input length')
+    for length in (1000, 2000, 4000, 8000, 16000, 32000):
+        for name, text in (
+                ('@ + word chars', '@' + 'a' * length),
+                ('@dev a + @', '@dev a' + '@' * length)):
+            print('{:<16} {:>7} {:>8.1f}ns {:>8.1f}ns'.format(
+                name, len(text),
+                best_time(scan_with_tag_re, text) / len(text) * 1e9,
+                best_time(scan_natspec, text) / len(text) * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Time registry lookups as the registry grows.
+
+Fills registry backends with synthetic records and reports the time
+per ``find`` (as done when resolving an autodoc directive) and per
+``members`` query. With ``sqlite-noindex``, the indexes of the SQLite
+registry are dropped after loading, for comparison::
+
+    python benchmarks/registry_lookup.py
+    python benchmarks/registry_lookup.py --sizes 1000 100000 --backends memory sqlite
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from sphinxcontrib.soliditydomain.registry import create_registry
+
+# members of every synthetic contract, besides the contract itself
+MEMBERS_PER_CONTRACT = 9
+
+
+def make_records(num_rows):
+    records = []
+    for i in range(num_rows // (MEMBERS_PER_CONTRACT + 1)):
+        file = 'pkg{}/C{}.sol'.format(i % 10, i)
+        contract = 'C{}'.format(i)
+        records.append(('contract', file, contract, contract, None, None, ''))
+        for j in range(MEMBERS_PER_CONTRACT):
+            name = 'f{}'.format(j)
+            records.append((
+                'function', file, '{}(uint256 a)'.format(name), name,
+                'uint256', contract, 'docs of {}'.format(name)))
+    return records
+
+
+def drop_indexes():
+    from sphinxcontrib.soliditydomain.sqliteregistry import db
+    names = [row[0] for row in db.execute_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'index'")]
+    for name in names:
+        db.execute_sql('DROP INDEX "{}"'.format(name))
+
+
+def time_per_call(func, args_list):
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[990, 9900, 49500])
+    parser.add_argument('--backends', nargs='+',
+                        default=['sqlite', 'sqlite-noindex'])
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    print('{:>16} {:>8} {:>12} {:>12}'.format(
+        'backend', 'rows', 'find', 'members'))
+    for backend in args.backends:
+        for size in args.sizes:
+            records = make_records(size)
+            registry = create_registry(backend.split('-')[0])
+            registry.add(records)
+            if backend == 'sqlite-noindex':
+                drop_indexes()
+
+            num_contracts = len(records) // (MEMBERS_PER_CONTRACT + 1)
+            picks = [(i * 7919) % num_contracts for i in range(args.queries)]
+            find_args = [('function', 'f3', None, 'C{}'.format(i))
+                         for i in picks]
+            members_args = [('pkg{}/C{}.sol'.format(i % 10, i),
+                             'C{}'.format(i)) for i in picks]
+            find = time_per_call(registry.find, find_args)
+            members = time_per_call(registry.members, members_args)
+            registry.close()
+
+            print('{:>16} {:>8} {:>10.1f}us {:>10.1f}us'.format(
+                backend, len(records), find * 1e6, members * 1e6))
+
+
+if __name__ == '__main__':
+    main()
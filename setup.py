@@ -43,9 +43,12 @@ setup(
 
     install_requires=[
         'antlr4-python3-runtime',
-        'peewee',
     ],
 
+    extras_require={
+        'sqlite': ['peewee'],
+    },
+
     package_data={
         'sphinxcontrib.soliditydomain': ['VERSION', 'Solidity.g4'],
     },
@@ -1,8 +1,13 @@
 import os
 
+from .dependencies import (
+    get_outdated_docs, merge_dependencies, purge_dependencies)
 from .domain import SolidityDomain
-from .documenters import all_solidity_documenters
-from .sourceregistry import build_source_registry, teardown_source_registry
+from .documenters import (
+    all_solidity_documenters, clear_resolve_cache, log_resolve_cache_stats)
+from .sourceregistry import (
+    PARSE_CACHE_FORMAT, build_source_registry, prepare_registry_for_readers,
+    teardown_source_registry)
 
 with open(os.path.join(os.path.dirname(__file__), 'VERSION')) as version_file:
     __version__ = version_file.read().strip()
@@ -10,25 +15,34 @@ with open(os.path.join(os.path.dirname(__file__), 'VERSION')) as version_file:
 def setup(app):
     app.add_config_value('autodoc_lookup_path',
                          os.path.join('..', 'contracts'), 'env')
+    app.add_config_value('autodoc_parse_cache', True, '')
+    app.add_config_value('autodoc_parse_jobs', None, '')
+    app.add_config_value('autodoc_skeleton_parse', True, '')
+    app.add_config_value('autodoc_tree_free_parse', False, '')
+    app.add_config_value('autodoc_registry_backend', 'memory', '')
+    app.add_config_value('autodoc_lazy_parse', False, '')
+    app.add_config_value('autodoc_keep_registry_warm', False, '')
+    app.add_config_value('autodoc_watch_sources', False, '')
 
     app.add_domain(SolidityDomain)
 
     app.connect('builder-inited', build_source_registry)
-    app.connect('env-before-read-docs', read_all_docs)
+    app.connect('builder-inited', clear_resolve_cache)
+    app.connect('env-get-outdated', get_outdated_docs)
+    app.connect('env-purge-doc', purge_dependencies)
+    app.connect('env-merge-info', merge_dependencies)
+    app.connect('env-before-read-docs', prepare_registry_for_readers)
+    app.connect('build-finished', log_resolve_cache_stats)
     app.connect('build-finished', teardown_source_registry)
 
     for documenter in all_solidity_documenters.values():
         app.add_autodocumenter(documenter)
 
+    return {
+        'version': __version__,
+        # documents hold what was parsed from the sources they use
+        'env_version': PARSE_CACHE_FORMAT,
+        'parallel_read_safe': True,
+        'parallel_write_safe': True,
+    }
 
-def read_all_docs(app, env, doc_names):
-    """Add all found docs to the to-be-read list, because we have no way of
-    telling which ones reference Solidity that might have changed.
-
-    Otherwise, builds go stale until you touch the stale RSTs or do a ``make
-    clean``.
-
-    This is straight-up lifted from `sphinx-js <https://github.com/erikrose/sphinx-js#sphinx-js>`_.
-
-    """
-    doc_names[:] = env.found_docs
@@ -0,0 +1,66 @@
+import hashlib
+
+from .sourceregistry import get_source_digests
+
+# Dependency key under which documents with lookups that could not be
+# resolved record a fingerprint of all sources, since any change to the set
+# of sources might make those lookups succeed.
+ALL_SOURCES = '*'
+
+
+def sources_fingerprint(digests):
+    return hashlib.sha1(repr(sorted(digests.items())).encode()).hexdigest()
+
+
+def get_dependencies(env):
+    if not hasattr(env, 'sol_dependencies'):
+        env.sol_dependencies = {}
+    return env.sol_dependencies
+
+
+def note_source_dependency(env, relsrcpath):
+    """Note that the current document uses objects from *relsrcpath*."""
+    get_dependencies(env).setdefault(env.docname, {})[relsrcpath] = \
+        get_source_digests().get(relsrcpath)
+
+
+def note_unresolved_dependency(env):
+    """Note that the current document has a lookup that found nothing."""
+    get_dependencies(env).setdefault(env.docname, {})[ALL_SOURCES] = \
+        sources_fingerprint(get_source_digests())
+
+
+def purge_dependencies(app, env, docname):
+    get_dependencies(env).pop(docname, None)
+
+
+def merge_dependencies(app, env, docnames, other):
+    other_dependencies = get_dependencies(other)
+    dependencies = get_dependencies(env)
+    for docname in docnames:
+        if docname in other_dependencies:
+            dependencies[docname] = other_dependencies[docname]
+
+
+def get_outdated_docs(app, env, added, changed, removed):
+    """Return the documents which used Solidity sources that have changed
+    since they were read."""
+    digests = get_source_digests()
+    fingerprint = None
+    outdated = []
+
+    for docname, dependencies in get_dependencies(env).items():
+        if docname in removed:
+            continue
+        for relsrcpath, digest in dependencies.items():
+            if relsrcpath == ALL_SOURCES:
+                if fingerprint is None:
+                    fingerprint = sources_fingerprint(digests)
+                is_outdated = digest != fingerprint
+            else:
+                is_outdated = digest != digests.get(relsrcpath)
+            if is_outdated:
+                outdated.append(docname)
+                break
+
+    return outdated
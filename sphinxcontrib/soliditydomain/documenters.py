@@ -1,13 +1,77 @@
 import re
+from functools import lru_cache
 from sphinx.ext.autodoc import (
     ALL, Documenter,
     bool_option, members_option, exclude_members_option)
+from .dependencies import note_source_dependency, note_unresolved_dependency
 from .domain import SolidityDomain
-from .sourceregistry import SolidityObject
+from .sourceregistry import (
+    get_registry, get_registry_generation, load_sources_for)
 
+from sphinx.locale import __
 from sphinx.util.logging import getLogger
 logger = getLogger(__name__)
 
+# Number of autodoc directive targets to remember the resolution of
+RESOLVE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def target_criteria(directive, target):
+    """Return the registry lookup criteria for the *target* of an autodoc
+    *directive*."""
+    # parse components out of name
+    (file, _, namepath) = target.rpartition(':')
+    (contract_name, _, fullname) = namepath.partition('.')
+    (name, _, paramtypes) = fullname.partition('(')
+
+    # normalize components
+    name = name.strip() or None
+
+    if directive in ('contract', 'interface', 'library') and name is None:
+        name = contract_name
+        contract_name = None
+
+    paramtypes = ','.join(ptype.strip() for ptype in paramtypes.split(','))
+    paramtypes = re.sub(r'\s+', ' ', paramtypes)
+    if paramtypes.endswith(')'):
+        paramtypes = paramtypes[:-1]
+
+    # get associated objects
+    criteria = (
+        ('objtype', directive),
+        ('name', name),
+        ('file', file),
+        ('contract_name', contract_name),
+        ('paramtypes', paramtypes),
+    )
+    return criteria
+
+
+@lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def resolve_target(criteria, generation):
+    """Return the objects found in the registry with the lookup *criteria*.
+
+    Many documents refer to the same popular contracts, so this is memoized
+    for the duration of a build. *generation* is the registry generation the
+    result is valid for, which keeps results from before objects were added
+    to the registry, e.g. by lazy parsing, from being reused. Any sources
+    needed must have been loaded before.
+    """
+    return get_registry().find(**dict(criteria))
+
+
+def clear_resolve_cache(app):
+    target_criteria.cache_clear()
+    resolve_target.cache_clear()
+
+
+def log_resolve_cache_stats(app, exception):
+    info = resolve_target.cache_info()
+    if info.hits or info.misses:
+        logger.info(__('resolved autodoc targets: %d cache hits, %d misses'),
+                    info.hits, info.misses)
+
 
 class SolidityObjectDocumenter(Documenter):
     domain = 'sol'
@@ -76,12 +140,10 @@ class SolidityObjectDocumenter(Documenter):
         if not want_all and not self.options.members:
             return
 
-        expressions = [
-            SolidityObject.file == self.object.file,
-            SolidityObject.contract_name == self.object.name
-        ]
-
-        if not want_all:
+        if want_all:
+            def is_included(member):
+                return True
+        else:
             members_inset = set()
             should_include_fallback = False
             should_include_constructor = False
@@ -94,38 +156,39 @@ class SolidityObjectDocumenter(Documenter):
                 elif member:
                     members_inset.add(member)
 
-            expr = SolidityObject.name.in_(members_inset)
-            if should_include_fallback:
-                expr |= (SolidityObject.objtype == 'function') & (SolidityObject.name.is_null(True))
-            if should_include_constructor:
-                expr |= (SolidityObject.objtype == 'constructor') & (SolidityObject.name.is_null(True))
-
-            expressions.append(expr)
-
-        if self.options.exclude_members:
-            should_exclude_fallback = False
-            should_exclude_constructor = False
-
-            if '<fallback>' in self.options.exclude_members:
-                self.options.exclude_members.remove('<fallback>')
-                should_exclude_fallback = True
-            if 'constructor' in self.options.exclude_members:
-                self.options.exclude_members.remove('constructor')
-                should_exclude_constructor = True
-
-            expr = SolidityObject.name.not_in(self.options.exclude_members)
+            def is_included(member):
+                if member.name is None:
+                    return (
+                        should_include_fallback and
+                        member.objtype == 'function' or
+                        should_include_constructor and
+                        member.objtype == 'constructor')
+                return member.name in members_inset
+
+        try:
+            exclude_members = set(self.options.exclude_members or ())
+        except TypeError:
+            # a bare :exclude-members: gives autodoc's EMPTY, which is not
+            # iterable and excludes nothing
+            exclude_members = set()
+        should_exclude_fallback = '<fallback>' in exclude_members
+        should_exclude_constructor = 'constructor' in exclude_members
+        should_exclude_private = '<private>' in exclude_members
+
+        def is_excluded(member):
+            if member.name is None:
+                return (
+                    should_exclude_fallback and
+                    member.objtype == 'function' or
+                    should_exclude_constructor and
+                    member.objtype == 'constructor')
+            return member.name in exclude_members
+
+        for member in get_registry().members(
+                self.object.file, self.object.name):
+            if not is_included(member) or is_excluded(member):
+                continue
 
-            subexpr = SolidityObject.name.is_null(True)
-            if should_exclude_fallback:
-                subexpr &= (SolidityObject.objtype != 'function')
-            if should_exclude_constructor:
-                subexpr &= (SolidityObject.objtype != 'constructor')
-            expr |= subexpr
-
-            expressions.append(expr)
-
-        should_exclude_private = '<private>' in self.options.exclude_members
-        for member in SolidityObject.select().where(*expressions):
             if member.objtype == 'function':
                 is_public = 'public' in member.signature or 'external' in member.signature
                 if should_exclude_private and not is_public:
@@ -142,65 +205,53 @@ class SolidityObjectDocumenter(Documenter):
             )
             documenter = all_solidity_documenters[member.objtype](
                 self.directive, full_mname, self.indent)
+            # the member is already known, so spare the lookup by name
+            documenter.object = member
             documenter.generate(all_members=True)
 
-    def generate(self, more_content=None, all_members=False):
-        # type: (Any, str, bool, bool) -> None
-        """Generate reST for the object given by *self.name*, and possibly for
-        its members.
-
-        If *more_content* is given, include that content.
-        If *all_members* is True, document all members.
-        """
+    def find_object(self):
+        """Look up the object given by *self.name* in the registry, returning
+        ``None`` if it cannot be found."""
         directive = getattr(self, 'directivetype', self.objtype)
+        criteria = target_criteria(directive, self.name)
+        # this may add objects to the registry, so it must come before
+        # taking the generation to look them up at
+        load_sources_for(**dict(criteria))
+        sol_objects = resolve_target(criteria, get_registry_generation())
 
-        # parse components out of name
-        (file, _, namepath) = self.name.rpartition(':')
-        (contract_name, _, fullname) = namepath.partition('.')
-        (name, _, paramtypes) = fullname.partition('(')
-
-        # normalize components
-        name = name.strip() or None
-
-        if directive in ('contract', 'interface', 'library') and name is None:
-            name = contract_name
-            contract_name = None
-
-        paramtypes = ','.join(ptype.strip() for ptype in paramtypes.split(','))
-        paramtypes = re.sub(r'\s+', ' ', paramtypes)
-        if paramtypes.endswith(')'):
-            paramtypes = paramtypes[:-1]
-
-        # build query
-        expressions = [
-            SolidityObject.objtype == directive,
-            SolidityObject.name == name,
-        ]
-
-        if file:
-            expressions.append(SolidityObject.file == file)
-        if contract_name:
-            expressions.append(SolidityObject.contract_name == contract_name)
-        if paramtypes:
-            expressions.append(SolidityObject.paramtypes == paramtypes)
-
-        # get associated object
-        query = SolidityObject.select().where(*expressions)
-        sol_objects = tuple(query)
         if len(sol_objects) == 0:
             logger.warning('{} {} could not be found via query:\n{}'.format(
                 directive, self.name, ',\n'.join(
-                    '  ' + str(expr.lhs.column_name) +
-                    str(expr.op) + ('' if expr.rhs is None else expr.rhs)
-                    for expr in expressions
+                    '  {}={}'.format(key, '' if value is None else value)
+                    for key, value in criteria
+                    if value or key in ('objtype', 'name')
                 )))
-            return
+            note_unresolved_dependency(self.env)
+            return None
         elif len(sol_objects) > 1:
             logger.warning('multiple candidates for {} {} found:\n{}'.format(
                 directive, self.name,
                 '\n'.join('  ' + obj.signature for obj in sol_objects)))
 
-        self.object = sol_objects[0]
+        for sol_object in sol_objects:
+            note_source_dependency(self.env, sol_object.file)
+
+        return sol_objects[0]
+
+    def generate(self, more_content=None, all_members=False):
+        # type: (Any, str, bool, bool) -> None
+        """Generate reST for the object given by *self.name*, unless
+        *self.object* has been set already, and possibly for its members.
+
+        If *more_content* is given, include that content.
+        If *all_members* is True, document all members.
+        """
+        directive = getattr(self, 'directivetype', self.objtype)
+
+        if self.object is None:
+            self.object = self.find_object()
+            if self.object is None:
+                return
 
         # begin rendering output
         sourcename = self.get_sourcename()
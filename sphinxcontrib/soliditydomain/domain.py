@@ -32,7 +32,9 @@ class SolidityObject(ObjectDescription):
         if fullname not in self.state.document.ids:
             signode['ids'].append(fullname2id(fullname))
             self.state.document.note_explicit_target(signode)
-            objects = self.env.domaindata['sol']['objects']
+            domain = self.env.get_domain('sol')
+            objects = domain.data['objects']
+            # the first description of an object is the one referenced
             if fullname in objects:
                 self.state_machine.reporter.warning(
                     'duplicate {type} description of {fullname}, '
@@ -41,7 +43,8 @@ class SolidityObject(ObjectDescription):
                         fullname=fullname,
                         otherloc=objects[fullname][0],
                     ), line=self.lineno)
-            objects[fullname] = (self.env.docname, self.objtype)
+            else:
+                domain.note_object(fullname, self.env.docname, self.objtype)
 
         indextext = '{} ({})'.format(fullname2namepath(fullname), _(self.objtype))
         if (self.objtype == 'constructor' or
@@ -318,6 +321,19 @@ class SolidityDomain(Domain):
         'enum':         SolidityEnum,
     }
 
+    object_types = {
+        'contract':     ObjType(_('contract'), 'contract'),
+        'library':      ObjType(_('library'), 'lib'),
+        'interface':    ObjType(_('interface'), 'interface'),
+        'statevar':     ObjType(_('state variable'), 'svar'),
+        'constructor':  ObjType(_('constructor'), 'cons'),
+        'function':     ObjType(_('function'), 'func'),
+        'modifier':     ObjType(_('modifier'), 'mod'),
+        'event':        ObjType(_('event'), 'event'),
+        'struct':       ObjType(_('struct'), 'struct'),
+        'enum':         ObjType(_('enum'), 'enum'),
+    }
+
     roles = {
         'contract':     SolidityXRefRole(),
         'lib':          SolidityXRefRole(),
@@ -332,21 +348,59 @@ class SolidityDomain(Domain):
     }
 
     initial_data = {
-        'objects': {},
+        'objects': {},  # fullname -> docname, objtype
+        # indexes for resolving references, mapping names and name paths
+        # to the fullnames of the objects with them, in the order noted
+        'names': {},  # name -> fullname -> None
+        'paths': {},  # name path -> fullname -> None
+        # reverse index of the objects described in each document
+        'docs': {},  # docname -> fullname -> None
     }
+    data_version = 2
+
+    def note_object(self, fullname, docname, objtype):
+        objects = self.data['objects']
+        if fullname in objects:
+            self.forget_object(fullname)
+        objects[fullname] = (docname, objtype)
+        self.data['docs'].setdefault(docname, {})[fullname] = None
+        self.data['names'].setdefault(fullname.name, {})[fullname] = None
+        self.data['paths'].setdefault(
+            fullname2namepath(fullname), {})[fullname] = None
+
+    def forget_object(self, fullname):
+        docname, _l = self.data['objects'].pop(fullname)
+        for index, key in (
+            ('names', fullname.name),
+            ('paths', fullname2namepath(fullname)),
+            ('docs', docname),
+        ):
+            fullnames = self.data[index][key]
+            del fullnames[fullname]
+            if not fullnames:
+                del self.data[index][key]
 
     def clear_doc(self, docname):
         # type: (unicode) -> None
-        for fullname, (fn, _l) in list(self.data['objects'].items()):
-            if fn == docname:
-                del self.data['objects'][fullname]
+        for fullname in list(self.data['docs'].get(docname, ())):
+            self.forget_object(fullname)
 
     def merge_domaindata(self, docnames, otherdata):
         # type: (List[unicode], Dict) -> None
-        # XXX check duplicates
-        for fullname, (fn, objtype) in otherdata['objects'].items():
-            if fn in docnames:
-                self.data['objects'][fullname] = (fn, objtype)
+        objects = self.data['objects']
+        for docname in docnames:
+            for fullname in otherdata['docs'].get(docname, ()):
+                objtype = otherdata['objects'][fullname][1]
+                if fullname in objects and objects[fullname][0] != docname:
+                    logger.warning(
+                        'duplicate {type} description of {fullname}, '
+                        'other instance in {otherloc}'.format(
+                            type=objtype,
+                            fullname=fullname,
+                            otherloc=objects[fullname][0],
+                        ), location=docname)
+                    continue
+                self.note_object(fullname, docname, objtype)
 
     def resolve_xref(self, env, fromdocname, builder,
                      typ, target, node, contnode):
@@ -364,7 +418,12 @@ class SolidityDomain(Domain):
         The method can also raise :exc:`sphinx.environment.NoUri` to suppress
         the :event:`missing-reference` event being emitted.
         """
-        for fullname, (docname, objtype) in self.data['objects'].items():
-            if fullname.name == target:
-                return make_refnode(builder, fromdocname, docname, fullname2id(fullname), contnode, fullname.name)
+        objtypes = self.objtypes_for_role(typ) or ()
+        objects = self.data['objects']
+        # a qualified name path, like Contract.member, or a bare name
+        for index in ('paths', 'names'):
+            for fullname in self.data[index].get(target, ()):
+                docname, objtype = objects[fullname]
+                if objtype in objtypes:
+                    return make_refnode(builder, fromdocname, docname, fullname2id(fullname), contnode, fullname.name)
         return None
@@ -0,0 +1,53 @@
+import re
+from collections import namedtuple
+
+# A NatSpec tag found in a doc comment, spanning text[start:end]
+NatSpecTag = namedtuple('NatSpecTag', ('name', 'payload', 'start', 'end'))
+
+# The start of a tag: its name, e.g. ``param``, ``inheritdoc`` or
+# ``custom:some-name``, and the whitespace after it. As the payload is never
+# empty, it takes the last of several whitespace characters followed by an
+# ``@`` or the end of the text. Only the name, which ends at the next ``@``
+# at the latest, is ever backtracked into by more than one character, so
+# searching stays linear.
+tag_start_re = re.compile(r'@(custom:[\w-]+|\w+)\s+(?=[^@])')
+
+# An ``@`` ending the payload of a tag: one which is preceded by whitespace
+# and not followed by whitespace and more payload, or one which is followed
+# by another ``@`` or the end of the text. Other ``@`` signs, such as those
+# in email addresses, belong to the payload.
+payload_end_re = re.compile(r'@(?:(?<=\s@)(?!\s[^@])|(?<!\s@)(?=@|\Z))')
+
+
+def scan_natspec(text):
+    r"""Split the NatSpec *text* of a doc comment into its tags and the text
+    outside of them.
+
+    Every character is looked at a bounded number of times, so this takes
+    linear time however many ``@`` signs the text contains. The result is
+    the same as finding the tags with the regular expression::
+
+        @(\w+) \s+ ( [^@]+ (?: (?: (?<!\s)@ | @\s ) [^@]+ )* )
+
+    except that ``@custom:...`` tags are recognized too.
+    """
+    tags = []
+    untagged = []
+    last_end = pos = 0
+
+    while True:
+        start = tag_start_re.search(text, pos)
+        if start is None:
+            break
+
+        payload_start = start.end()
+        end = payload_end_re.search(text, payload_start + 1)
+        end = len(text) if end is None else end.start()
+
+        tags.append(NatSpecTag(
+            start.group(1), text[payload_start:end], start.start(), end))
+        untagged.append(text[last_end:start.start()])
+        last_end = pos = end
+
+    untagged.append(text[last_end:])
+    return tags, ''.join(untagged)
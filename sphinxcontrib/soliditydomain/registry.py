@@ -0,0 +1,135 @@
+from collections import defaultdict
+
+# Field order of the plain record tuples produced by ``DefinitionsRecorder``
+RECORD_FIELDS = (
+    'objtype', 'file', 'signature', 'name',
+    'paramtypes', 'contract_name', 'docs',
+)
+
+
+class SolidityObject(object):
+    """A Solidity language object found in a source file."""
+    __slots__ = RECORD_FIELDS
+
+    def __init__(self, objtype, file, signature, name=None, paramtypes=None,
+                 contract_name=None, docs=''):
+        self.objtype = objtype
+        self.file = file
+        self.signature = signature
+        self.name = name
+        self.paramtypes = paramtypes
+        self.contract_name = contract_name
+        self.docs = docs
+
+    def __repr__(self):
+        return '<SolidityObject {} {} in {}>'.format(
+            self.objtype, self.signature, self.file)
+
+
+class Registry(object):
+    """Interface of the stores of Solidity objects used by the documenters.
+
+    Objects found in a source file are added as record tuples with the fields
+    given in :data:`RECORD_FIELDS`, and come back as objects with those
+    fields as attributes.
+    """
+
+    def add(self, records):
+        """Add *records* and return the number of objects added."""
+        raise NotImplementedError
+
+    def find(self, objtype, name, file=None, contract_name=None,
+             paramtypes=None):
+        """Return a tuple of the objects matching the given criteria, where
+        falsy *file*, *contract_name* and *paramtypes* match anything."""
+        raise NotImplementedError
+
+    def members(self, file, contract_name):
+        """Return the objects of the contract *contract_name* defined in
+        *file*, in the order they were added."""
+        raise NotImplementedError
+
+    def remove_file(self, file):
+        """Remove all objects defined in *file*."""
+        raise NotImplementedError
+
+    def prepare_fork(self):
+        """Called before Sphinx forks its parallel reader processes, which
+        may then query the registry."""
+        pass
+
+    def close(self):
+        pass
+
+
+class MemoryRegistry(Registry):
+    """Registry keeping Solidity objects in plain dictionaries."""
+
+    def __init__(self):
+        self.by_name = defaultdict(list)
+        self.by_contract = defaultdict(list)
+        self.by_key = defaultdict(list)
+        self.by_file = defaultdict(list)
+
+    def add(self, records):
+        for record in records:
+            obj = SolidityObject(*record)
+            self.by_name[obj.objtype, obj.name].append(obj)
+            self.by_contract[obj.file, obj.contract_name].append(obj)
+            self.by_key[
+                obj.objtype, obj.file, obj.contract_name,
+                obj.name, obj.paramtypes,
+            ].append(obj)
+            self.by_file[obj.file].append(obj)
+        return len(records)
+
+    def find(self, objtype, name, file=None, contract_name=None,
+             paramtypes=None):
+        if file and contract_name and paramtypes:
+            return tuple(self.by_key.get(
+                (objtype, file, contract_name, name, paramtypes), ()))
+
+        return tuple(
+            obj for obj in self.by_name.get((objtype, name), ())
+            if (not file or obj.file == file) and
+            (not contract_name or obj.contract_name == contract_name) and
+            (not paramtypes or obj.paramtypes == paramtypes)
+        )
+
+    def members(self, file, contract_name):
+        return list(self.by_contract.get((file, contract_name), ()))
+
+    def remove_file(self, file):
+        for obj in self.by_file.pop(file, ()):
+            # the other indexes are keyed by file, apart from by_name
+            self.by_contract.pop((file, obj.contract_name), None)
+            self.by_key.pop((
+                obj.objtype, file, obj.contract_name,
+                obj.name, obj.paramtypes,
+            ), None)
+            name_key = (obj.objtype, obj.name)
+            others = [other for other in self.by_name.get(name_key, ())
+                      if other.file != file]
+            if others:
+                self.by_name[name_key] = others
+            else:
+                self.by_name.pop(name_key, None)
+
+    def close(self):
+        self.by_name.clear()
+        self.by_contract.clear()
+        self.by_key.clear()
+        self.by_file.clear()
+
+
+def create_registry(backend, dirname=None):
+    """Create an empty registry using the backend named *backend*, which may
+    keep files in the directory *dirname*."""
+    if backend == 'memory':
+        # forked processes simply get a copy of the dictionaries
+        return MemoryRegistry()
+    elif backend == 'sqlite':
+        # peewee is only needed for this backend
+        from .sqliteregistry import SqliteRegistry
+        return SqliteRegistry(dirname)
+    raise ValueError('unknown registry backend {!r}'.format(backend))
@@ -1,35 +1,44 @@
+import hashlib
 import json
 import os
+import pickle
 import posixpath
 import re
-from collections import OrderedDict
-from functools import wraps
+from collections import OrderedDict, defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, wraps
 from itertools import takewhile
-from antlr4 import FileStream, CommonTokenStream, ParseTreeWalker
+from antlr4 import CommonTokenStream, PredictionMode, Token
+from antlr4.error.ErrorListener import ErrorListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
 from antlr4.tree.Tree import TerminalNodeImpl
-from peewee import Model, CharField, TextField, SqliteDatabase
 from .SolidityLexer import SolidityLexer
 from .SolidityParser import SolidityParser
 from .SolidityListener import SolidityListener
+from .natspec import scan_natspec
+from .registry import create_registry
+from .streams import (
+    SLIM_TOKEN_FACTORY, CompactFileStream, DocCommentIndex,
+    SkeletonTokenSource)
 
 from sphinx.locale import __
 from sphinx.util.logging import getLogger
+from sphinx.util.parallel import parallel_available
 logger = getLogger(__name__)
 
-db = SqliteDatabase(':memory:')
+# Bump whenever the records or warnings extracted from a source unit change
+# shape or content for the same input, so that stale parse caches are
+# discarded.
+PARSE_CACHE_FORMAT = 3
+PARSE_CACHE_FILENAME = 'soliditydomain.cache'
 
+CONTRACT_OBJTYPES = ('contract', 'interface', 'library')
+PRESCAN_KEYWORDS = CONTRACT_OBJTYPES + ('import', 'pragma')
 
-class SolidityObject(Model):
-    objtype = CharField()
-    file = CharField()
-    signature = CharField()
-    name = CharField(null=True)
-    paramtypes = CharField(null=True)
-    contract_name = CharField(null=True)
-    docs = TextField(default='')
-
-    class Meta:
-        database = db
+# What parsing a single source unit yields. Only plain data, so that it may
+# be sent back from a worker process.
+ParseResult = namedtuple('ParseResult', ('records', 'warnings', 'll_fallback'))
 
 
 def remove_prefix(text, prefix):
@@ -39,60 +48,541 @@ def remove_prefix(text, prefix):
     return text
 
 
-def build_source_registry(app):
-    db.connect()
-    db.create_tables((SolidityObject,))
+def parse_cache_version(skeleton):
+    """Return a key identifying everything besides the source content that
+    determines the records extracted from a source unit, including whether
+    they were extracted with *skeleton* parsing."""
+    here = os.path.dirname(__file__)
+    digest = hashlib.sha1(repr((PARSE_CACHE_FORMAT, skeleton)).encode())
+    for name in ('VERSION', 'Solidity.g4'):
+        with open(os.path.join(here, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def load_parse_cache(path, skeleton):
+    """Load a mapping of relative source paths to ``(digest, records,
+    warnings)`` triples, discarding the cache if it is unreadable, out of
+    date or was saved with a different *skeleton* parsing setting."""
+    try:
+        with open(path, 'rb') as f:
+            version, sources = pickle.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.info(__('discarding unreadable parse cache %s: %s'), path, e)
+        return {}
+
+    if version != parse_cache_version(skeleton):
+        return {}
 
-    lookup_path = app.env.config.autodoc_lookup_path
+    return sources
 
+
+def save_parse_cache(path, sources, skeleton):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump((parse_cache_version(skeleton), sources), f,
+                        pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        logger.warning(__('could not write parse cache %s: %s'), path, e)
+
+
+def iter_sol_sources(lookup_path):
+    """Yield ``(srcpath, relsrcpath)`` for every Solidity source file found
+    under *lookup_path*."""
     for root, dirs, files in os.walk(lookup_path):
         dirs[:] = (name for name in dirs if not name.startswith('.'))
         for name in files:
             if os.path.splitext(name)[1].lower() == '.sol':
-                parse_sol(os.path.join(root, name), relsrcpath=remove_prefix(
+                yield os.path.join(root, name), remove_prefix(
                     posixpath.join(
                         posixpath.relpath(root, lookup_path),
                         name),
-                    './'))
+                    './')
 
 
-def teardown_source_registry(app, exception):
-    db.close()
-
-
-tag_re = re.compile(
-    r''' @ (\w+)
-        \s+
-        ( [^@]+ (?: (?: (?<! \s) @ | @ \s) [^@]+)* )
+prescan_token_re = re.compile(
+    r''' (?P<comment> //[^\n]* | /\*.*?(?:\*/|\Z) )
+        | (?P<string> "(?:\\.|[^"\\\n])*" | '(?:\\.|[^'\\\n])*' )
+        | (?P<word> [\w$]+ )
+        | (?P<punct> \S )
     ''',
-    re.VERBOSE | re.MULTILINE | re.DOTALL
+    re.VERBOSE | re.DOTALL
 )
 
-param_re = re.compile(
-    r'(\S*)\s*(.*)',
-    re.MULTILINE | re.DOTALL
-)
+# The declarations, imports and pragmas found by prescanning a source
+SourceSummary = namedtuple('SourceSummary', ('contracts', 'imports', 'pragmas'))
+# The file stat, content digest and prescan summary of a source
+ScannedSource = namedtuple('ScannedSource', ('stat', 'digest', 'summary'))
+
+
+def resolve_import(path, relsrcpath):
+    if path.startswith(('./', '../')):
+        return posixpath.normpath(
+            posixpath.join(posixpath.dirname(relsrcpath), path))
+    return path
+
+
+def prescan_sol(content, relsrcpath):
+    """Summarize the Solidity source *content* without parsing it, using only
+    a lightweight tokenizer.
+
+    Only file-level ``contract``, ``interface`` and ``library`` declarations,
+    ``import`` directives and ``pragma`` directives are picked up. Relative
+    import paths are resolved against *relsrcpath*.
+    """
+    text = content.decode('utf8', 'replace')
+    contracts = []
+    imports = []
+    pragmas = []
+    depth = 0
+    # the file-level keyword being scanned, and what was found after it
+    keyword = None
+    found = None
+    found_end = None
+
+    for match in prescan_token_re.finditer(text):
+        kind = match.lastgroup
+        if kind == 'comment':
+            continue
+        token = match.group()
+
+        if keyword is not None:
+            if keyword in CONTRACT_OBJTYPES:
+                if kind == 'word':
+                    contracts.append(token)
+                keyword = None
+            elif token == ';':
+                if keyword == 'pragma' and found is not None:
+                    pragmas.append(
+                        (found, text[found_end:match.start()].strip()))
+                elif keyword == 'import' and found is not None:
+                    imports.append(resolve_import(found, relsrcpath))
+                keyword = None
+                continue
+            elif found is None:
+                if keyword == 'pragma':
+                    found, found_end = token, match.end()
+                elif kind == 'string':
+                    found = token[1:-1]
+                continue
+            else:
+                continue
+
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth = max(depth - 1, 0)
+        elif depth == 0 and token in PRESCAN_KEYWORDS:
+            keyword = token
+            found = None
+
+    return SourceSummary(contracts, imports, pragmas)
+
+
+class PrescanIndex(object):
+    """What prescanning found in each source, by relative source path."""
+
+    def __init__(self):
+        # contract name -> relsrcpaths of the sources declaring it
+        self.declared_in = defaultdict(list)
+        # relsrcpath -> import paths
+        self.imports = {}
+        # relsrcpath -> (name, value) pairs of the pragma directives
+        self.pragmas = {}
+
+    def add(self, relsrcpath, summary):
+        for name in summary.contracts:
+            self.declared_in[name].append(relsrcpath)
+        self.imports[relsrcpath] = summary.imports
+        self.pragmas[relsrcpath] = summary.pragmas
+
+
+class LazySources(object):
+    """Sources which are only parsed once an autodoc directive needs objects
+    from them."""
+
+    def __init__(self, prescan_index, parse_options):
+        self.declared_in = prescan_index.declared_in
+        self.parse_options = parse_options
+        # relsrcpath -> (srcpath, digest) of the sources not parsed yet
+        self.unparsed = OrderedDict()
+
+    def add(self, srcpath, relsrcpath, digest):
+        self.unparsed[relsrcpath] = (srcpath, digest)
+
+    def select(self, objtype, name, file=None, contract_name=None,
+               paramtypes=None):
+        """Return the unparsed sources which may define objects matching
+        the criteria of :meth:`Registry.find`."""
+        if file:
+            candidates = (file,)
+        elif contract_name:
+            candidates = self.declared_in.get(contract_name)
+        elif objtype in CONTRACT_OBJTYPES:
+            candidates = self.declared_in.get(name)
+        else:
+            candidates = None
+
+        if candidates is None:
+            candidates = self.unparsed
+
+        return [relsrcpath for relsrcpath in candidates
+                if relsrcpath in self.unparsed]
+
 
+def get_parse_jobs(app):
+    """Return the number of processes to parse Solidity sources with, which
+    is Sphinx's own ``-j`` unless ``autodoc_parse_jobs`` says otherwise."""
+    jobs = app.config.autodoc_parse_jobs
+    if jobs is None:
+        jobs = app.parallel
+    if jobs == 'auto':
+        jobs = os.cpu_count() or 1
+    return max(int(jobs or 1), 1)
 
-def get_docs_from_comments_for_obj(ctx):
-    rawlines = []
 
-    num_spaces_to_strip = None
+def parse_sol_sources(sources, jobs=1, **options):
+    """Parse the ``(srcpath, relsrcpath)`` pairs in *sources*, yielding the
+    results of each in the same order. *options* are passed on to
+    :func:`parse_sol`.
 
-    for comment in ctx.parser._input.getHiddenTokensToLeft(
-        ctx.start.tokenIndex
-    ) or ():
-        if comment.text.startswith('///'):
-            text = comment.text[3:].rstrip()
-            if num_spaces_to_strip is None:
-                num_spaces_to_strip = len(text) - len(text.lstrip())
-            rawlines.append(text[num_spaces_to_strip:])
-        elif comment.text.startswith('/**'):
-            for rawline in comment.text[3:-2].splitlines():
-                rawlines.append(rawline.strip().lstrip('*').lstrip())
+    With more than one job, the parsing happens in a pool of worker
+    processes. Warnings are always logged from this process, in source order.
+    """
+    parse = partial(parse_sol, **options)
+    if jobs > 1 and len(sources) > 1 and parallel_available:
+        jobs = min(jobs, len(sources))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = executor.map(
+                parse, *zip(*sources),
+                chunksize=max(len(sources) // (jobs * 4), 1))
+            for (srcpath, _), result in zip(sources, results):
+                yield log_parse_result(srcpath, result)
+    else:
+        for srcpath, relsrcpath in sources:
+            yield log_parse_result(srcpath, parse(srcpath, relsrcpath))
 
-    rawdocs = '\n'.join(rawlines)
 
+def log_parse_result(srcpath, result, cached=False):
+    """Log the warnings of parsing the source at *srcpath*, which are the
+    same whether the *result* was just parsed or *cached*."""
+    if not cached:
+        logger.info(__('parsing %s'), srcpath)
+    for warning in result.warnings:
+        logger.warning(warning)
+    return result
+
+
+def scan_source(srcpath, relsrcpath, previous=None):
+    """Return a :class:`ScannedSource` for the source at *srcpath*, which is
+    only read if its file stat differs from that of *previous*."""
+    st = os.stat(srcpath)
+    stat = (st.st_mtime_ns, st.st_size)
+    if previous is not None and previous.stat == stat:
+        return previous
+    with open(srcpath, 'rb') as f:
+        content = f.read()
+    return ScannedSource(stat, hashlib.sha1(content).hexdigest(),
+                         prescan_sol(content, relsrcpath))
+
+
+class RegistryState(object):
+    """The registry of Solidity objects found in the sources being
+    documented, and what is known about those sources.
+
+    There is one instance per process, which outlives a build when the
+    registry is kept warm, so that the next build only has to parse the
+    sources which changed.
+    """
+
+    def __init__(self):
+        # the registry of the current build, or of the last one if warm
+        self.registry = None
+        # bumped whenever objects are added to the registry, so that lookups
+        # memoized against an earlier state of it can be told apart
+        self.generation = 0
+        # what the registry was built from
+        self.options = None
+        self.skeleton = False
+        # relsrcpath -> ScannedSource and content digest of the sources
+        self.scanned = {}
+        self.digests = {}
+        # relsrcpath -> (digest, records, warnings) of the sources in the
+        # registry, which are saved to the parse cache at *cache_path*, if any
+        self.parsed = {}
+        self.cache_path = None
+        # sources not parsed yet when parsing lazily
+        self.lazy_sources = None
+        # watcher of the sources of a warm registry, if enabled
+        self.watcher = None
+
+    def open(self, app, options):
+        """Make sure that there is a registry for a build with *options*,
+        and return whether the one of the previous build is kept."""
+        warm = (app.config.autodoc_keep_registry_warm and
+                self.registry is not None and self.options == options)
+        if not warm:
+            if self.registry is not None:
+                self.registry.close()
+            self.registry = create_registry(
+                app.config.autodoc_registry_backend, app.doctreedir)
+        self.options = options
+        self.generation += 1
+        return warm
+
+    def take_watched_changes(self, app, lookup_path, parse_options, warm):
+        """Start or stop the source watcher as configured, and return the
+        changes it saw since the previous build, as returned by
+        :meth:`SourceWatcher.take_changes`, or ``None`` if the sources must
+        be scanned."""
+        watching = (app.config.autodoc_watch_sources and
+                    app.config.autodoc_keep_registry_warm)
+        changes = None
+        if self.watcher is not None:
+            if warm and watching:
+                changes = self.watcher.take_changes()
+            if changes is None:
+                self.watcher.stop()
+                self.watcher = None
+        if watching and self.watcher is None:
+            from .watcher import SourceWatcher
+            self.watcher = SourceWatcher(
+                lookup_path, parse_options,
+                parse=not app.config.autodoc_lazy_parse)
+            logger.info(__('watching Solidity sources using %s'),
+                        self.watcher.kind)
+        return changes
+
+    def load_parse_cache(self, app, warm):
+        if not app.config.autodoc_parse_cache:
+            self.cache_path = None
+            return {}
+        self.cache_path = os.path.join(app.doctreedir, PARSE_CACHE_FILENAME)
+        # a warm registry already holds everything in the parse cache
+        if warm:
+            return {}
+        return load_parse_cache(self.cache_path, self.skeleton)
+
+    def build(self, app):
+        lookup_path = app.env.config.autodoc_lookup_path
+        parse_options = dict(skeleton=app.config.autodoc_skeleton_parse,
+                             tree_free=app.config.autodoc_tree_free_parse)
+        options = (app.config.autodoc_registry_backend, app.doctreedir,
+                   os.path.abspath(lookup_path),
+                   sorted(parse_options.items()))
+
+        # With a registry kept warm from the previous build in this process,
+        # only sources which changed since then are parsed again
+        warm = self.open(app, options)
+        registered = self.parsed if warm else {}
+        previous = self.scanned if warm else {}
+        self.skeleton = parse_options['skeleton']
+
+        # A watcher of the sources of a warm registry has already read and
+        # possibly parsed those which changed, and knows which ones exist
+        changes = self.take_watched_changes(
+            app, lookup_path, parse_options, warm)
+        if changes is None:
+            sources = iter_sol_sources(lookup_path)
+            watched = {}
+        else:
+            sources, watched = changes
+
+        cache = self.load_parse_cache(app, warm)
+        prescan_index = app.sol_prescan = PrescanIndex()
+        if app.config.autodoc_lazy_parse:
+            self.lazy_sources = LazySources(prescan_index, parse_options)
+        else:
+            self.lazy_sources = None
+
+        self.scanned = {}
+        self.digests = {}
+        self.parsed = {}
+        found = []
+        unparsed = []
+
+        for srcpath, relsrcpath in sources:
+            update = watched.get(relsrcpath)
+            if update is not None:
+                scanned = ScannedSource(
+                    update.stat, update.digest, update.summary)
+            elif changes is not None and relsrcpath in previous:
+                # the watcher saw no change to it
+                scanned = previous[relsrcpath]
+            else:
+                scanned = scan_source(
+                    srcpath, relsrcpath, previous.get(relsrcpath))
+            digest = scanned.digest
+            self.scanned[relsrcpath] = scanned
+            self.digests[relsrcpath] = digest
+            prescan_index.add(relsrcpath, scanned.summary)
+
+            kept = registered.get(relsrcpath)
+            if kept is not None and kept[0] == digest:
+                self.parsed[relsrcpath] = kept
+                log_parse_result(
+                    srcpath, ParseResult(kept[1], kept[2], False), cached=True)
+                continue
+
+            if update is not None and update.records is not None:
+                found.append((relsrcpath, digest, log_parse_result(
+                    srcpath, ParseResult(update.records, update.warnings,
+                                         False),
+                    cached=True)))
+                continue
+
+            cached = cache.get(relsrcpath)
+            if cached is not None and cached[0] == digest:
+                found.append((relsrcpath, digest, log_parse_result(
+                    srcpath, ParseResult(cached[1], cached[2], False),
+                    cached=True)))
+            elif self.lazy_sources is not None:
+                self.lazy_sources.add(srcpath, relsrcpath, digest)
+            else:
+                found.append((relsrcpath, digest, None))
+                unparsed.append((srcpath, relsrcpath))
+
+        # drop the objects of sources which were changed or deleted
+        num_kept = len(self.parsed)
+        num_deleted = 0
+        for relsrcpath in registered:
+            if relsrcpath not in self.parsed:
+                self.registry.remove_file(relsrcpath)
+                num_deleted += relsrcpath not in self.digests
+
+        num_rows, num_ll_fallbacks = self.add_sources(
+            found, parse_sol_sources(
+                unparsed, jobs=get_parse_jobs(app), **parse_options))
+        logger.info(__('indexed %d Solidity objects from %d sources'),
+                    num_rows, len(found))
+
+        if watched:
+            logger.info(__('applied %d Solidity source changes from the '
+                           'watcher'), len(watched))
+
+        if warm:
+            logger.info(__('kept %d unchanged Solidity sources in the '
+                           'registry, updated %d, dropped %d'),
+                        num_kept, len(registered) - num_kept - num_deleted,
+                        num_deleted)
+
+        if unparsed:
+            logger.info(__('parsed %d Solidity sources, %d of which needed '
+                           'full LL prediction'),
+                        len(unparsed), num_ll_fallbacks)
+
+        if self.cache_path is not None and not warm:
+            logger.info(__('loaded %d of %d Solidity sources from parse '
+                           'cache'),
+                        len(found) - len(unparsed), len(self.digests))
+
+        if self.lazy_sources is not None:
+            logger.info(__('deferred parsing %d Solidity sources'),
+                        len(self.lazy_sources.unparsed))
+
+    def add_sources(self, found, parsed):
+        """Add the ``(relsrcpath, digest, result)`` triples in *found* to
+        the registry and the parse cache, taking the parse results from
+        *parsed* in turn where they are ``None``.
+
+        Returns the numbers of objects added and of parses which needed
+        full LL prediction.
+        """
+        all_records = []
+        num_ll_fallbacks = 0
+
+        for relsrcpath, digest, result in found:
+            if result is None:
+                result = next(parsed)
+                num_ll_fallbacks += result.ll_fallback
+            self.parsed[relsrcpath] = (digest, result.records, result.warnings)
+            all_records.extend(result.records)
+
+        self.generation += 1
+        return self.registry.add(all_records), num_ll_fallbacks
+
+    def load_sources_for(self, **criteria):
+        if self.lazy_sources is None:
+            return
+
+        relsrcpaths = self.lazy_sources.select(**criteria)
+        if not relsrcpaths:
+            return
+
+        found = []
+        unparsed = []
+        for relsrcpath in relsrcpaths:
+            srcpath, digest = self.lazy_sources.unparsed.pop(relsrcpath)
+            found.append((relsrcpath, digest, None))
+            unparsed.append((srcpath, relsrcpath))
+
+        self.add_sources(found, parse_sol_sources(
+            unparsed, **self.lazy_sources.parse_options))
+
+    def teardown(self, app):
+        if not app.config.autodoc_keep_registry_warm:
+            if self.watcher is not None:
+                self.watcher.stop()
+                self.watcher = None
+            self.registry.close()
+            self.registry = None
+        if self.cache_path is not None:
+            save_parse_cache(self.cache_path, self.parsed, self.skeleton)
+
+
+# The registry and sources of the current build
+state = RegistryState()
+
+
+def get_registry():
+    """Return the registry of the current build."""
+    return state.registry
+
+
+def get_registry_generation():
+    """Return a number which changes whenever the registry does."""
+    return state.generation
+
+
+def get_source_digests():
+    """Return the content digests of the sources of the current build."""
+    return state.digests
+
+
+def load_sources_for(**criteria):
+    """Make sure that all sources which may define objects matching the
+    criteria of :meth:`Registry.find` have been parsed and added to the
+    registry, which only matters when parsing lazily."""
+    state.load_sources_for(**criteria)
+
+
+def build_source_registry(app):
+    state.build(app)
+
+
+def prepare_registry_for_readers(app, env, docnames):
+    """Let the registry prepare for the reader processes forked by a
+    parallel build, once all sources have been added to it."""
+    if app.parallel > 1 and docnames and state.registry is not None:
+        state.registry.prepare_fork()
+
+
+def teardown_source_registry(app, exception):
+    state.teardown(app)
+
+
+param_re = re.compile(
+    r'(\S*)\s*(.*)',
+    re.MULTILINE | re.DOTALL
+)
+
+
+def get_docs_from_comments(rawdocs):
+    """Format the NatSpec text *rawdocs* of a doc comment as the content of
+    a directive."""
     doclines = []
     options = []
 
@@ -113,8 +603,9 @@ def get_docs_from_comments_for_obj(ctx):
         # HACK?: indent after first line
         return '\n   '.join(lines)
 
-    for tagmatch in tag_re.finditer(rawdocs):
-        tagname, tagpayload = tagmatch.groups()
+    tags, untagged = scan_natspec(rawdocs)
+
+    for tagname, tagpayload, _, _ in tags:
 
         if tagname == 'dev':
             demux_and_append_docs(tagpayload)
@@ -139,7 +630,7 @@ def get_docs_from_comments_for_obj(ctx):
             options.append(':{}: {}'.format(
                 tagname, prep_payload_docs(tagpayload)))
 
-    moredocs = demux_and_append_docs(tag_re.sub('', rawdocs))
+    moredocs = demux_and_append_docs(untagged)
 
     if moredocs:
         doclines.append(moredocs)
@@ -148,17 +639,6 @@ def get_docs_from_comments_for_obj(ctx):
                               map('\n'.join, (doclines, options))))
 
 
-def format_ctx_list(ctx_list):
-    if ctx_list is None:
-        return ''
-
-    return '(' + ', '.join(
-        ' '.join(
-            child.getText()
-            for child in pctx.getChildren())
-        for pctx in ctx_list) + ')'
-
-
 def absorb_and_log_exceptions(ast_visitor):
     @wraps(ast_visitor)
     def wrapper(self, ctx):
@@ -167,21 +647,101 @@ def absorb_and_log_exceptions(ast_visitor):
         except (KeyboardInterrupt, SystemExit):
             raise
         except Exception as e:
-            logger.warning('parsing error occured in {}:{} during {}'.format(self.source_unit_name, self.current_contract_name, ast_visitor.__name__))
+            self.warnings.append('parsing error occured in {}:{} during {}'.format(self.source_unit_name, self.current_contract_name, ast_visitor.__name__))
     return wrapper
 
 
+# The listener methods of DefinitionsRecorder for the declarations which
+# may appear in a contract or at the top level of a source unit
+DECLARATION_LISTENER_METHODS = {
+    SolidityParser.StateVariableDeclarationContext:
+        'enterStateVariableDeclaration',
+    SolidityParser.FunctionDefinitionContext: 'enterFunctionDefinition',
+    SolidityParser.ModifierDefinitionContext: 'enterModifierDefinition',
+    SolidityParser.EventDefinitionContext: 'enterEventDefinition',
+    SolidityParser.StructDefinitionContext: 'enterStructDefinition',
+    SolidityParser.EnumDefinitionContext: 'enterEnumDefinition',
+}
+
+
 class DefinitionsRecorder(SolidityListener):
-    def __init__(self, source_unit_name):
+    def __init__(self, source_unit_name, doc_comments, tokens=None):
         self.current_contract_name = None
         self.source_unit_name = source_unit_name
+        self.doc_comments = doc_comments
+        # the token list of the parse tree, unless it has error nodes or
+        # conjured tokens, which only the parse tree itself knows about
+        self.tokens = tokens
+        self.records = []
+        self.warnings = []
+
+    def text(self, node):
+        """Return the same text as ``node.getText()``, from one slice of the
+        token list rather than by walking the subtree of *node*."""
+        if self.tokens is None:
+            return node.getText()
+        if isinstance(node, TerminalNodeImpl):
+            return node.symbol.text
+        start, stop = node.start, node.stop
+        if start is stop:
+            return start.text
+        return ''.join(
+            token.text
+            for token in self.tokens[start.tokenIndex:stop.tokenIndex + 1]
+            if token.channel == Token.DEFAULT_CHANNEL)
+
+    def format_ctx_list(self, ctx_list):
+        if ctx_list is None:
+            return ''
+
+        return '(' + ', '.join(
+            ' '.join(
+                self.text(child)
+                for child in pctx.getChildren())
+            for pctx in ctx_list) + ')'
+
+    def get_docs(self, ctx):
+        return get_docs_from_comments(
+            self.doc_comments.get(ctx.start.tokenIndex))
+
+    def add_record(self, objtype, signature, name=None, paramtypes=None,
+                   contract_name=None, docs=''):
+        self.records.append((
+            objtype, self.source_unit_name, signature, name,
+            paramtypes, contract_name, docs,
+        ))
+
+    def record_source_unit(self, ctx):
+        """Record the definitions in the parse tree of a source unit.
+
+        Unlike walking the whole tree with a
+        :class:`~antlr4.tree.Tree.ParseTreeWalker`, this only descends into
+        contract definitions and their parts, and never into the bodies of
+        functions and modifiers, so it takes time in the number of
+        declarations rather than in the number of tokens. The listener
+        methods are called in the same order as by the walker.
+        """
+        for child in ctx.getChildren():
+            if isinstance(child, SolidityParser.ContractDefinitionContext):
+                self.enterContractDefinition(child)
+                for part in child.contractPart():
+                    for declaration in part.getChildren():
+                        self.record_declaration(declaration)
+                self.exitContractDefinition(child)
+            else:
+                self.record_declaration(child)
+
+    def record_declaration(self, ctx):
+        name = DECLARATION_LISTENER_METHODS.get(type(ctx))
+        if name is not None:
+            getattr(self, name)(ctx)
 
     @absorb_and_log_exceptions
     def enterContractDefinition(self, ctx):
-        name = ctx.identifier().getText()
+        name = self.text(ctx.identifier())
 
         if self.current_contract_name is not None:
-            logger.warning('trying to enter {} while already in {}'.format(
+            self.warnings.append('trying to enter {} while already in {}'.format(
                 name,
                 self.current_contract_name))
             return
@@ -192,19 +752,18 @@ class DefinitionsRecorder(SolidityListener):
             name,
             *(ctx.inheritanceSpecifier() and
                 ('is', ', '.join(
-                    node.getText()
+                    self.text(node)
                     for node in ctx.inheritanceSpecifier())))
         ))
 
         self.current_contract_name = name
 
-        SolidityObject.create(
+        self.add_record(
             objtype=objtype,
-            file=self.source_unit_name,
             signature=signature,
             name=name,
             contract_name=None,
-            docs=get_docs_from_comments_for_obj(ctx),
+            docs=self.get_docs(ctx),
         )
 
     @absorb_and_log_exceptions
@@ -214,28 +773,27 @@ class DefinitionsRecorder(SolidityListener):
     @absorb_and_log_exceptions
     def enterStateVariableDeclaration(self, ctx):
         signature = ' '.join(
-            child.getText() for child in takewhile(
-                lambda child: child.getText() not in ('=', ';'),
+            self.text(child) for child in takewhile(
+                lambda child: self.text(child) not in ('=', ';'),
                 ctx.getChildren(),
             )
         )
 
-        SolidityObject.create(
+        self.add_record(
             objtype='statevar',
-            file=self.source_unit_name,
             signature=signature,
-            name=ctx.identifier().getText(),
+            name=self.text(ctx.identifier()),
             contract_name=self.current_contract_name,
-            docs=get_docs_from_comments_for_obj(ctx),
+            docs=self.get_docs(ctx),
         )
 
     @absorb_and_log_exceptions
     def add_function_like_to_db(self, ctx):
         if hasattr(ctx, 'functionDescriptor'):
             identifier = ctx.functionDescriptor().identifier()
-            name = identifier is not None and identifier.getText() or None
+            name = identifier is not None and self.text(identifier) or None
         else:
-            name = ctx.identifier().getText()
+            name = self.text(ctx.identifier())
 
         if hasattr(ctx, 'parameterList') and ctx.parameterList() is not None:
             params = ctx.parameterList().parameter()
@@ -247,35 +805,36 @@ class DefinitionsRecorder(SolidityListener):
         if params is None:
             paramtypes = None
         else:
-            paramtypes = ','.join(param.typeName().getText()
+            paramtypes = ','.join(self.text(param.typeName())
                                   for param in params)
 
-        params_str = format_ctx_list(params)
+        params_str = self.format_ctx_list(params)
 
         signature = ' '.join((
             ('' if name is None else name) + params_str,
             *(
                 ('{}{}'.format(
-                    child.identifier().getText(),
-                    format_ctx_list(child.expressionList().expression()),
+                    self.text(child.identifier()),
+                    self.format_ctx_list(
+                        child.expressionList().expression()),
                 ) if isinstance(
                     child,
                     SolidityParser.ModifierInvocationContext,
                 ) and child.expressionList() is not None else
-                    child.getText()
+                    self.text(child)
                     for child in ctx.modifierList().getChildren())
                 if hasattr(ctx, 'modifierList') else
                 ()
             ),
             *(
-                (ctx.AnonymousKeyword().getText(),)
+                (self.text(ctx.AnonymousKeyword()),)
                 if hasattr(ctx, 'AnonymousKeyword')
                 and ctx.AnonymousKeyword() is not None else
                 ()
             ),
             *(
                 ('{} {}'.format(
-                    ctx.returnParameters().start.text, format_ctx_list(
+                    ctx.returnParameters().start.text, self.format_ctx_list(
                         ctx.returnParameters().parameterList().parameter())),)
                 if hasattr(ctx, 'returnParameters')
                 and ctx.returnParameters() is not None
@@ -284,14 +843,13 @@ class DefinitionsRecorder(SolidityListener):
             ),
         ))
 
-        SolidityObject.create(
+        self.add_record(
             objtype=ctx.start.text,
-            file=self.source_unit_name,
             signature=signature,
             name=name,
             paramtypes=paramtypes,
             contract_name=self.current_contract_name,
-            docs=get_docs_from_comments_for_obj(ctx),
+            docs=self.get_docs(ctx),
         )
 
     enterConstructorDefinition = add_function_like_to_db
@@ -301,16 +859,16 @@ class DefinitionsRecorder(SolidityListener):
 
     @absorb_and_log_exceptions
     def enterStructDefinition(self, ctx):
-        docs = get_docs_from_comments_for_obj(ctx)
+        docs = self.get_docs(ctx)
 
         signature = ' '.join((
             ctx.start.text,
-            ctx.identifier().getText(),
+            self.text(ctx.identifier()),
         ))
 
         members = tuple(
             ' '.join(
-                child.getText()
+                self.text(child)
                 for child in vdctx.getChildren()
             )
             for vdctx in ctx.variableDeclaration()
@@ -318,26 +876,180 @@ class DefinitionsRecorder(SolidityListener):
 
     @absorb_and_log_exceptions
     def enterEnumDefinition(self, ctx):
-        docs = get_docs_from_comments_for_obj(ctx)
+        docs = self.get_docs(ctx)
 
         signature = ' '.join((
             ctx.start.text,
-            ctx.identifier().getText(),
+            self.text(ctx.identifier()),
         ))
 
         members = tuple(
-            enum_val.getText()
+            self.text(enum_val)
             for enum_val in ctx.enumValue()
         )
 
 
-def parse_sol(srcpath, relsrcpath):
-    logger.info(__('parsing %s'), srcpath)
-    src = FileStream(srcpath, encoding='utf8')
+class ParseDefinitionsRecorder(DefinitionsRecorder):
+    """A :class:`DefinitionsRecorder` to attach to the parser as a parse
+    listener. Declarations are recorded as soon as they have been parsed,
+    and are then pruned from the parse tree along with the contract parts
+    and top-level definitions holding them, so that the tree never grows
+    beyond the declaration being parsed.
+
+    On exit from a rule, its context is complete, so the recording methods
+    of :class:`DefinitionsRecorder` are called on exit instead of on entry.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # a contract entered, but not recorded yet
+        self.pending_contract = None
+
+    def record_pending_contract(self):
+        """Record the contract being parsed, once its name and base
+        contracts are known, and before any of its members."""
+        if self.pending_contract is not None:
+            ctx, self.pending_contract = self.pending_contract, None
+            DefinitionsRecorder.enterContractDefinition(self, ctx)
+
+    def enterContractDefinition(self, ctx):
+        self.pending_contract = ctx
+
+    def exitContractDefinition(self, ctx):
+        self.record_pending_contract()
+        DefinitionsRecorder.exitContractDefinition(self, ctx)
+
+    def record_on_exit(record):
+        def exit(self, ctx):
+            self.record_pending_contract()
+            record(self, ctx)
+        return exit
+
+    def ignore(self, ctx):
+        pass
+
+    enterStateVariableDeclaration = ignore
+    enterFunctionDefinition = ignore
+    enterModifierDefinition = ignore
+    enterEventDefinition = ignore
+    enterStructDefinition = ignore
+    enterEnumDefinition = ignore
+
+    exitStateVariableDeclaration = record_on_exit(
+        DefinitionsRecorder.enterStateVariableDeclaration)
+    exitFunctionDefinition = record_on_exit(
+        DefinitionsRecorder.add_function_like_to_db)
+    exitModifierDefinition = record_on_exit(
+        DefinitionsRecorder.add_function_like_to_db)
+    exitEventDefinition = record_on_exit(
+        DefinitionsRecorder.add_function_like_to_db)
+    exitStructDefinition = record_on_exit(
+        DefinitionsRecorder.enterStructDefinition)
+    exitEnumDefinition = record_on_exit(
+        DefinitionsRecorder.enterEnumDefinition)
+
+    del record_on_exit, ignore
+
+    def exitEveryRule(self, ctx):
+        # called after the exit method of the rule itself
+        parent = ctx.parentCtx
+        if (isinstance(ctx, SolidityParser.ContractPartContext) or
+                isinstance(parent, SolidityParser.SourceUnitContext)):
+            if parent.children and parent.children[-1] is ctx:
+                parent.removeLastChild()
+
+
+class TokenTextInvalidator(ErrorListener):
+    """Makes *recorder* take the text of the declarations parsed after a
+    syntax error from the parse tree, as it may have error nodes or
+    conjured tokens from then on."""
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.recorder.tokens = None
+
+
+class SyntaxErrorCollector(ErrorListener):
+    """Collects the syntax errors reported while lexing and parsing the
+    source at *relsrcpath* as warnings, rather than printing them."""
+
+    def __init__(self, relsrcpath):
+        self.relsrcpath = relsrcpath
+        self.warnings = []
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.warnings.append('{}: line {}:{} {}'.format(
+            self.relsrcpath, line, column, msg))
+
+
+def parse_sol(srcpath, relsrcpath, skeleton=False, tree_free=False,
+              content=None):
+    """Parse the Solidity source at *srcpath* and return a
+    :class:`ParseResult` with the definitions found in it.
+
+    If *content* is given, it is parsed as the bytes of the source instead
+    of reading them from *srcpath*.
+
+    If *skeleton* is true, the contents of function and modifier bodies are
+    skipped at the token level, which does not change the definitions found.
+    If *tree_free* is true, the definitions are recorded during parsing by a
+    :class:`ParseDefinitionsRecorder`, rather than from the complete parse
+    tree afterwards, which also does not change them.
+    """
+    # A new lexer and parser for every source costs next to nothing: their
+    # DFA and prediction context caches are class attributes, which every
+    # instance shares and which stay warm across sources.
+    src = CompactFileStream(srcpath, encoding='utf8', content=content)
     lexer = SolidityLexer(src)
-    stream = CommonTokenStream(lexer)
+    lexer._factory = SLIM_TOKEN_FACTORY
+    syntax_errors = SyntaxErrorCollector(relsrcpath)
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(syntax_errors)
+    stream = CommonTokenStream(
+        SkeletonTokenSource(lexer) if skeleton else lexer)
     parser = SolidityParser(stream)
-    tree = parser.sourceUnit()
-    recorder = DefinitionsRecorder(relsrcpath)
-    walker = ParseTreeWalker()
-    walker.walk(recorder, tree)
+    doc_comments = DocCommentIndex(stream.tokens)
+
+    def add_parse_recorder():
+        recorder = ParseDefinitionsRecorder(
+            relsrcpath, doc_comments, stream.tokens)
+        parser.addParseListener(recorder)
+        parser.addErrorListener(TokenTextInvalidator(recorder))
+        return recorder
+
+    # Two-stage parsing: SLL prediction is much cheaper than full LL and
+    # almost always suffices, so try it first and bail out on the first
+    # error. Only then is the source parsed again with full LL prediction
+    # and the usual error reporting and recovery.
+    parser._interp.predictionMode = PredictionMode.SLL
+    parser._errHandler = BailErrorStrategy()
+    parser.removeErrorListeners()
+    if tree_free:
+        recorder = add_parse_recorder()
+    try:
+        tree = parser.sourceUnit()
+        ll_fallback = False
+    except ParseCancellationException:
+        parser._interp.predictionMode = PredictionMode.LL
+        parser._errHandler = DefaultErrorStrategy()
+        parser.removeErrorListeners()
+        parser.addErrorListener(syntax_errors)
+        # start over with what the first stage recorded discarded; the
+        # parse listeners must be gone before resetting, which otherwise
+        # fails trying to remove a tracer that was never added
+        parser.removeParseListeners()
+        parser.reset()
+        if tree_free:
+            recorder = add_parse_recorder()
+        tree = parser.sourceUnit()
+        ll_fallback = True
+
+    if not tree_free:
+        recorder = DefinitionsRecorder(
+            relsrcpath, doc_comments,
+            None if parser.getNumberOfSyntaxErrors() else stream.tokens)
+        recorder.record_source_unit(tree)
+    return ParseResult(recorder.records,
+                       syntax_errors.warnings + recorder.warnings, ll_fallback)
@@ -0,0 +1,129 @@
+import os
+import sqlite3
+from urllib.request import pathname2url
+
+from peewee import Model, CharField, TextField, SqliteDatabase, chunked
+from .registry import RECORD_FIELDS, Registry
+
+db = SqliteDatabase(':memory:')
+
+SNAPSHOT_FILENAME = 'soliditydomain.sqlite'
+
+# Rows per INSERT statement, which keeps the number of bound parameters
+# below SQLite's default limit of 999
+INSERT_BATCH_SIZE = 999 // len(RECORD_FIELDS)
+
+
+class SolidityObject(Model):
+    objtype = CharField()
+    file = CharField()
+    signature = CharField()
+    name = CharField(null=True)
+    paramtypes = CharField(null=True)
+    contract_name = CharField(null=True)
+    docs = TextField(default='')
+
+    class Meta:
+        database = db
+        # Matching the lookups done by the documenters. These are only
+        # created once the registry has been loaded.
+        indexes = (
+            (('objtype', 'name', 'contract_name'), False),
+            (('file', 'contract_name'), False),
+        )
+
+
+class SqliteRegistry(Registry):
+    """Registry keeping Solidity objects in an in-memory SQLite database.
+
+    SQLite connections must not be used across a fork, as done by Sphinx's
+    parallel readers. So if given a *dirname*, a snapshot of the database is
+    saved there by :meth:`prepare_fork`, and forked processes load their own
+    copy of the database from it before the first query.
+    """
+
+    def __init__(self, dirname=None):
+        if dirname is None:
+            self.snapshot_path = None
+        else:
+            self.snapshot_path = os.path.join(dirname, SNAPSHOT_FILENAME)
+        self.owner_pid = self.pid = os.getpid()
+        db.init(':memory:')
+        db.connect()
+        SolidityObject._schema.create_table()
+
+    def check_process(self):
+        """Switch to a copy of the database restored from the snapshot when
+        running in a process forked since the last query."""
+        if self.pid == os.getpid():
+            return
+        self.pid = os.getpid()
+        # this throws away the in-memory database inherited from the parent
+        db.init(':memory:')
+        db.connect()
+        snapshot = sqlite3.connect(
+            'file:{}?mode=ro'.format(pathname2url(self.snapshot_path)), uri=True)
+        try:
+            snapshot.backup(db.connection())
+        finally:
+            snapshot.close()
+
+    def prepare_fork(self):
+        """Save a snapshot of the database for forked processes to load."""
+        if self.snapshot_path is None or self.pid != self.owner_pid:
+            return
+        tmppath = '{}.{}'.format(self.snapshot_path, self.pid)
+        snapshot = sqlite3.connect(tmppath)
+        try:
+            db.connection().backup(snapshot)
+        finally:
+            snapshot.close()
+        os.replace(tmppath, self.snapshot_path)
+
+    def add(self, records):
+        """Bulk insert *records* in a single transaction."""
+        self.check_process()
+        fields = [getattr(SolidityObject, name) for name in RECORD_FIELDS]
+        with db.atomic():
+            for batch in chunked(records, INSERT_BATCH_SIZE):
+                SolidityObject.insert_many(batch, fields=fields).execute()
+        SolidityObject._schema.create_indexes()
+        return len(records)
+
+    def find(self, objtype, name, file=None, contract_name=None,
+             paramtypes=None):
+        expressions = [
+            SolidityObject.objtype == objtype,
+            SolidityObject.name == name,
+        ]
+
+        if file:
+            expressions.append(SolidityObject.file == file)
+        if contract_name:
+            expressions.append(SolidityObject.contract_name == contract_name)
+        if paramtypes:
+            expressions.append(SolidityObject.paramtypes == paramtypes)
+
+        self.check_process()
+        # in the order they were added, not that of the index used
+        return tuple(SolidityObject.select().where(*expressions)
+                     .order_by(SolidityObject.id))
+
+    def members(self, file, contract_name):
+        self.check_process()
+        return list(SolidityObject.select().where(
+            SolidityObject.file == file,
+            SolidityObject.contract_name == contract_name,
+        ).order_by(SolidityObject.id))
+
+    def remove_file(self, file):
+        self.check_process()
+        SolidityObject.delete().where(SolidityObject.file == file).execute()
+
+    def close(self):
+        db.close()
+        if self.snapshot_path is not None and self.pid == self.owner_pid:
+            try:
+                os.remove(self.snapshot_path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,242 @@
+import codecs
+import sys
+from itertools import islice
+from antlr4 import InputStream, Token
+from antlr4.CommonTokenFactory import CommonTokenFactory
+from antlr4.Token import CommonToken
+from .SolidityLexer import SolidityLexer
+
+
+def literal_token_type(literal):
+    return SolidityLexer.literalNames.index("'{}'".format(literal))
+
+
+OPEN_BRACE = literal_token_type('{')
+CLOSE_BRACE = literal_token_type('}')
+SEMICOLON = literal_token_type(';')
+OPEN_PAREN = literal_token_type('(')
+CLOSE_PAREN = literal_token_type(')')
+
+# Tokens starting declarations which may be followed by a body
+BODIED_DECLARATION_STARTS = frozenset((
+    literal_token_type('function'),
+    literal_token_type('modifier'),
+    SolidityLexer.ConstructorKeyword,
+    SolidityLexer.FallbackKeyword,
+    SolidityLexer.ReceiveKeyword,
+))
+
+
+# UTF-32 in the native byte order, as read by memoryview.cast('I')
+UTF32_NATIVE = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+
+
+class CompactFileStream(InputStream):
+    """Drop-in replacement for :class:`antlr4.FileStream` which keeps the
+    code points of the file in a compact buffer instead of a list of Python
+    ints.
+
+    ASCII text, which most Solidity sources are, is kept as the encoded
+    bytes themselves, at one byte per character. Other text is kept as UTF-32
+    at four bytes per character, indexed through a ``memoryview``.
+    """
+    # InputStream declares __slots__ for all of its own attributes, so
+    # this keeps instances free of a __dict__
+    __slots__ = ('fileName',)
+
+    def __init__(self, fileName, encoding='ascii', errors='strict',
+                 content=None):
+        # read binary to avoid line ending conversion
+        if content is None:
+            with open(fileName, 'rb') as file:
+                content = file.read()
+        super().__init__(codecs.decode(content, encoding, errors))
+        self.fileName = fileName
+
+    def _loadString(self):
+        self._index = 0
+        try:
+            self.data = self.strdata.encode('ascii')
+        except UnicodeEncodeError:
+            # a view of the encoded text, which saves copying it to an array
+            self.data = memoryview(
+                self.strdata.encode(UTF32_NATIVE)).cast('I')
+        self._size = len(self.data)
+
+    @property
+    def sourceName(self):
+        return self.fileName
+
+
+class SlimToken(Token):
+    """Token which behaves like a :class:`antlr4.Token.CommonToken`, but is
+    smaller and quicker to create.
+
+    ``CommonToken`` does not declare ``__slots__``, so every instance also
+    carries a ``__dict__``, and its constructor goes through the one of
+    ``Token`` first. A slim token only has the slots of ``Token``, and its
+    text is sliced from the input stream only when asked for.
+    """
+    __slots__ = ()
+
+    def __init__(self, source, type, channel, start, stop, line, column):
+        self.source = source
+        self.type = type
+        self.channel = channel
+        self.start = start
+        self.stop = stop
+        self.tokenIndex = -1
+        self.line = line
+        self.column = column
+        self._text = None
+
+    text = CommonToken.text
+
+    def clone(self):
+        t = SlimToken(self.source, self.type, self.channel, self.start,
+                      self.stop, self.line, self.column)
+        t.tokenIndex = self.tokenIndex
+        t._text = self._text
+        return t
+
+    __str__ = CommonToken.__str__
+
+
+class SlimTokenFactory(CommonTokenFactory):
+    """Token factory creating :class:`SlimToken` instances."""
+
+    def create(self, source, type, text, channel, start, stop, line, column):
+        t = SlimToken(source, type, channel, start, stop, line, column)
+        if text is not None:
+            t._text = text
+        return t
+
+    def createThin(self, type, text):
+        t = SlimToken(CommonToken.EMPTY_SOURCE, type, Token.DEFAULT_CHANNEL,
+                      -1, -1, None, -1)
+        t._text = text
+        return t
+
+
+SLIM_TOKEN_FACTORY = SlimTokenFactory()
+
+
+class SkeletonTokenSource(object):
+    """Token source which passes on the tokens of *lexer*, except for the
+    contents of function, constructor and modifier bodies.
+
+    Only the braces delimiting such a body are kept, which the parser sees as
+    an empty block. Since declarations, and the comments preceding them, are
+    left untouched, the definitions recorded from the resulting parse tree
+    are the same as for the full token stream.
+    """
+
+    def __init__(self, lexer):
+        self.lexer = lexer
+        self._factory = lexer._factory
+        # brace nesting inside the body being skipped, if any
+        self.body_depth = 0
+        # whether the next token begins a declaration
+        self.at_declaration_start = True
+        # whether the current declaration is one with a body
+        self.in_bodied_declaration = False
+        # parenthesis nesting outside of bodies
+        self.paren_depth = 0
+
+    def nextToken(self):
+        while True:
+            token = self.lexer.nextToken()
+            ttype = token.type
+
+            if self.body_depth:
+                if ttype == Token.EOF:
+                    return token
+                if token.channel != Token.DEFAULT_CHANNEL:
+                    continue
+                if ttype == OPEN_BRACE:
+                    self.body_depth += 1
+                elif ttype == CLOSE_BRACE:
+                    self.body_depth -= 1
+                    if not self.body_depth:
+                        self.at_declaration_start = True
+                        return token
+                continue
+
+            if token.channel != Token.DEFAULT_CHANNEL:
+                return token
+
+            if self.at_declaration_start:
+                self.in_bodied_declaration = (
+                    ttype in BODIED_DECLARATION_STARTS)
+                self.at_declaration_start = False
+
+            if ttype == OPEN_PAREN:
+                self.paren_depth += 1
+            elif ttype == CLOSE_PAREN:
+                self.paren_depth = max(self.paren_depth - 1, 0)
+            elif self.paren_depth:
+                # braces in parameter lists or modifier and base constructor
+                # arguments, such as those of struct literals, never start
+                # a body
+                pass
+            elif ttype == OPEN_BRACE:
+                if self.in_bodied_declaration:
+                    self.in_bodied_declaration = False
+                    self.body_depth = 1
+                else:
+                    self.at_declaration_start = True
+            elif ttype in (SEMICOLON, CLOSE_BRACE):
+                self.at_declaration_start = True
+
+            return token
+
+    def getSourceName(self):
+        return self.lexer.sourceName
+
+
+class DocCommentIndex(object):
+    """The text of the doc comments preceding the tokens of a token stream,
+    keyed by token index.
+
+    The index is built in a single pass over the tokens, which only goes as
+    far as the tokens looked up so far. It can therefore be used while the
+    stream is still being filled by the parser. ``///`` comments have their
+    common indentation removed, and ``/** */`` comments have each line
+    stripped of leading asterisks.
+    """
+
+    def __init__(self, tokens):
+        # the token list of a BufferedTokenStream, which keeps growing
+        self.tokens = tokens
+        self.num_scanned = 0
+        self.lines = []
+        self.num_spaces_to_strip = None
+        self.docs = {}
+
+    def get(self, token_index):
+        """Return the text of the doc comments between *token_index* and the
+        previous token on the default channel."""
+        if token_index >= self.num_scanned:
+            self.scan(token_index + 1)
+        return self.docs.get(token_index, '')
+
+    def scan(self, stop):
+        for token in islice(self.tokens, self.num_scanned, stop):
+            if token.channel == Token.DEFAULT_CHANNEL:
+                if self.lines:
+                    self.docs[token.tokenIndex] = '\n'.join(self.lines)
+                    self.lines = []
+                self.num_spaces_to_strip = None
+                continue
+
+            text = token.text
+            if text.startswith('///'):
+                text = text[3:].rstrip()
+                if self.num_spaces_to_strip is None:
+                    self.num_spaces_to_strip = len(text) - len(text.lstrip())
+                self.lines.append(text[self.num_spaces_to_strip:])
+            elif text.startswith('/**'):
+                for line in text[3:-2].splitlines():
+                    self.lines.append(line.strip().lstrip('*').lstrip())
+
+        self.num_scanned = max(self.num_scanned, stop)
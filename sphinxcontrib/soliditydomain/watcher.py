@@ -0,0 +1,370 @@
+import ctypes
+import ctypes.util
+import errno
+import hashlib
+import os
+import select
+import struct
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from .sourceregistry import iter_sol_sources, parse_sol, prescan_sol
+
+from sphinx.locale import __
+from sphinx.util.logging import getLogger
+logger = getLogger(__name__)
+
+# inotify event masks, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+    IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+
+inotify_event = struct.Struct('iIII')
+
+# What the watcher found out about a changed source, where *records* is
+# ``None`` if it was not parsed
+WatchedSource = namedtuple(
+    'WatchedSource', ('stat', 'digest', 'summary', 'records', 'warnings'))
+
+
+def load_libc():
+    """Return the C library if it provides inotify, or ``None``."""
+    name = ctypes.util.find_library('c')
+    if name is None:
+        return None
+    try:
+        libc = ctypes.CDLL(name, use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, 'inotify_init1'):
+        return None
+    libc.inotify_add_watch.argtypes = (
+        ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+    return libc
+
+
+def is_sol_source(name):
+    return os.path.splitext(name)[1].lower() == '.sol'
+
+
+class InotifyBackend(object):
+    """Change notification using Linux inotify."""
+
+    def __init__(self, libc, lookup_path):
+        self.libc = libc
+        self.lookup_path = lookup_path
+        # watch descriptor -> watched directory
+        self.dirs = {}
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        try:
+            for root, dirs, files in os.walk(lookup_path):
+                dirs[:] = (name for name in dirs if not name.startswith('.'))
+                self.add_watch(root)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def add_watch(self, path):
+        wd = self.libc.inotify_add_watch(
+            self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(err, 'inotify_add_watch failed for {}'.format(path))
+        self.dirs[wd] = path
+
+    def fileno(self):
+        return self.fd
+
+    def read_changes(self):
+        """Return the paths of the changed sources and whether everything
+        must be rescanned, after the inotify descriptor became readable."""
+        data = os.read(self.fd, 64 * 1024)
+        paths = set()
+        rescan = False
+        offset = 0
+
+        while offset < len(data):
+            wd, mask, cookie, length = inotify_event.unpack_from(data, offset)
+            offset += inotify_event.size
+            name = os.fsdecode(
+                data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            root = self.dirs.get(wd)
+            if root is None or not name:
+                continue
+
+            path = os.path.join(root, name)
+            if mask & IN_ISDIR:
+                if name.startswith('.'):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # watch the new tree, then pick up what is already in it
+                    for subroot, dirs, files in os.walk(path):
+                        dirs[:] = (
+                            name for name in dirs if not name.startswith('.'))
+                        self.add_watch(subroot)
+                        paths.update(os.path.join(subroot, name)
+                                     for name in files if is_sol_source(name))
+                else:
+                    # sources below a moved or deleted directory are gone
+                    rescan = True
+            elif is_sol_source(name):
+                paths.add(path)
+
+        return paths, rescan
+
+    def close(self):
+        os.close(self.fd)
+
+
+class SourceWatcher(object):
+    """Watches the Solidity sources under *lookup_path* from a background
+    thread, reading, prescanning and, if *parse* is true, parsing those which
+    change, so that the next build only needs to apply the results.
+
+    Changes are collected until none came in for *debounce* seconds. Linux
+    inotify is used when available, and otherwise the tree is polled every
+    *poll_interval* seconds.
+    """
+
+    def __init__(self, lookup_path, parse_options, parse=True,
+                 debounce=0.2, poll_interval=1.0):
+        self.lookup_path = lookup_path
+        self.parse_options = parse_options
+        self.parse = parse
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+
+        # relsrcpath -> srcpath of the sources known to exist
+        self.sources = OrderedDict(
+            (relsrcpath, srcpath)
+            for srcpath, relsrcpath in iter_sol_sources(lookup_path))
+        # srcpath -> stat of the sources as last seen
+        self.stats = self.scan_stats()
+        # the same, as last processed
+        self.processed_stats = dict(self.stats)
+        # relsrcpath -> WatchedSource, or None for deleted sources
+        self.results = {}
+        # srcpaths changed since they were last processed
+        self.pending = set()
+        self.last_change = 0
+
+        self.lock = threading.Lock()
+        self.flushed = threading.Condition(self.lock)
+        self.flush_requested = False
+        self.stopped = False
+        self.wakeup_r, self.wakeup_w = os.pipe()
+
+        self.backend = None
+        libc = load_libc()
+        if libc is not None:
+            try:
+                self.backend = InotifyBackend(libc, lookup_path)
+            except OSError as e:
+                logger.info(
+                    __('cannot watch %s with inotify, polling instead: %s'),
+                    lookup_path, e)
+
+        self.thread = threading.Thread(
+            target=self.run, name='soliditydomain-watcher', daemon=True)
+        self.thread.start()
+
+    @property
+    def kind(self):
+        return 'polling' if self.backend is None else 'inotify'
+
+    def relsrcpath(self, srcpath):
+        return os.path.relpath(srcpath, self.lookup_path).replace(os.sep, '/')
+
+    def scan_stats(self):
+        stats = {}
+        for srcpath, relsrcpath in iter_sol_sources(self.lookup_path):
+            try:
+                st = os.stat(srcpath)
+            except OSError:
+                continue
+            stats[srcpath] = (st.st_mtime_ns, st.st_size)
+        return stats
+
+    def poll(self):
+        """Return the sources which changed since the last poll."""
+        stats = self.scan_stats()
+        changed = {
+            srcpath for srcpath in stats.keys() | self.stats.keys()
+            if stats.get(srcpath) != self.stats.get(srcpath)
+        }
+        self.stats = stats
+        return changed
+
+    def rescan(self):
+        """Return all sources known to exist or found to exist now, so
+        that all of them are checked."""
+        return set(self.sources.values()) | {
+            srcpath for srcpath, relsrcpath
+            in iter_sol_sources(self.lookup_path)}
+
+    def run(self):
+        try:
+            self.watch()
+        except Exception as e:
+            logger.warning(__('Solidity source watcher stopped: %s'), e)
+            with self.lock:
+                self.stopped = True
+                self.flushed.notify_all()
+
+    def watch(self):
+        while True:
+            with self.lock:
+                if self.stopped:
+                    return
+                flush = self.flush_requested
+                pending = bool(self.pending)
+
+            if flush:
+                timeout = 0
+            elif pending:
+                timeout = max(
+                    self.last_change + self.debounce - time.monotonic(), 0)
+            elif self.backend is None:
+                timeout = self.poll_interval
+            else:
+                timeout = None
+
+            readers = [self.wakeup_r]
+            if self.backend is not None:
+                readers.append(self.backend)
+            ready, _, _ = select.select(readers, [], [], timeout)
+
+            if self.wakeup_r in ready:
+                os.read(self.wakeup_r, 512)
+
+            with self.lock:
+                flush = self.flush_requested
+
+            changed = set()
+            if self.backend is None:
+                if flush or not ready:
+                    changed = self.poll()
+            else:
+                if flush and self.backend not in ready:
+                    ready, _, _ = select.select([self.backend], [], [], 0)
+                if self.backend in ready:
+                    changed, rescan = self.backend.read_changes()
+                    if rescan:
+                        changed = self.rescan()
+
+            with self.lock:
+                if changed:
+                    self.pending.update(changed)
+                    self.last_change = time.monotonic()
+                due = self.pending and (
+                    flush or
+                    time.monotonic() - self.last_change >= self.debounce)
+                if due:
+                    pending, self.pending = self.pending, set()
+
+            if due:
+                self.process(pending)
+
+            # Acknowledge a flush after draining the changes ready at the
+            # time once, rather than waiting for no more to be ready, which
+            # never happens while something keeps writing sources. Later
+            # changes are left for the next flush.
+            if flush:
+                with self.lock:
+                    self.flush_requested = False
+                    self.flushed.notify_all()
+
+    def process(self, srcpaths):
+        for srcpath in sorted(srcpaths):
+            relsrcpath = self.relsrcpath(srcpath)
+            try:
+                st = os.stat(srcpath)
+                with open(srcpath, 'rb') as f:
+                    content = f.read()
+            except FileNotFoundError:
+                self.processed_stats.pop(srcpath, None)
+                with self.lock:
+                    if self.sources.pop(relsrcpath, None) is not None:
+                        self.results[relsrcpath] = None
+                continue
+
+            stat = (st.st_mtime_ns, st.st_size)
+            if self.processed_stats.get(srcpath) == stat:
+                continue
+            self.processed_stats[srcpath] = stat
+            digest = hashlib.sha1(content).hexdigest()
+            summary = prescan_sol(content, relsrcpath)
+            records = warnings = None
+            if self.parse:
+                # parse the content read above, which the digest and summary
+                # are of, rather than what the file may have become since
+                try:
+                    result = parse_sol(srcpath, relsrcpath, content=content,
+                                       **self.parse_options)
+                except Exception:
+                    # leave it to the build to parse and report
+                    pass
+                else:
+                    records, warnings = result.records, result.warnings
+
+            with self.lock:
+                self.sources.setdefault(relsrcpath, srcpath)
+                self.results[relsrcpath] = WatchedSource(
+                    stat, digest, summary, records, warnings)
+
+    def take_changes(self):
+        """Wait for pending changes to be processed, then return the
+        ``(srcpath, relsrcpath)`` pairs of all sources and the results for
+        the sources which changed since the last call, or ``None`` if the
+        watcher stopped."""
+        with self.lock:
+            if not self.stopped:
+                self.flush_requested = True
+                os.write(self.wakeup_w, b'\0')
+                while self.flush_requested and not self.stopped:
+                    self.flushed.wait()
+            if self.stopped:
+                return None
+            results, self.results = self.results, {}
+            sources = [(srcpath, relsrcpath)
+                       for relsrcpath, srcpath in self.sources.items()]
+        return sources, results
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+        os.write(self.wakeup_w, b'\0')
+        self.thread.join()
+        if self.backend is not None:
+            self.backend.close()
+        os.close(self.wakeup_r)
+        os.close(self.wakeup_w)
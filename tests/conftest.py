@@ -0,0 +1,54 @@
+import io
+
+import pytest
+from sphinx.testing.path import path as sphinx_path
+from sphinx.testing.util import SphinxTestApp
+
+
+class SphinxProject(object):
+    """A Sphinx project in a temporary directory, documenting the Solidity
+    sources in its ``contracts`` directory."""
+
+    def __init__(self, path):
+        self.path = path
+        self.contracts = path / 'contracts'
+        self.contracts.mkdir()
+        (path / 'conf.py').write_text(
+            "extensions = ['sphinx.ext.autodoc', "
+            "'sphinxcontrib.soliditydomain']\n"
+            "autodoc_lookup_path = {!r}\n".format(str(self.contracts)))
+        self.write_doc('index', 'Solidity\n========\n')
+
+    def write_doc(self, docname, content):
+        (self.path / (docname + '.rst')).write_text(content)
+
+    def write_source(self, name, content):
+        (self.contracts / name).write_text(content)
+
+    def remove_doc(self, docname):
+        (self.path / (docname + '.rst')).unlink()
+
+    def build(self, builder='dummy', parallel=0, **overrides):
+        """Build the project and return its status output and warnings.
+
+        The application is kept as *app*, and the names of the documents
+        read as *read_docs*.
+        """
+        status, warning = io.StringIO(), io.StringIO()
+        self.app = SphinxTestApp(
+            builder, srcdir=sphinx_path(self.path), confoverrides=overrides,
+            status=status, warning=warning, parallel=parallel)
+        self.read_docs = []
+        self.app.connect(
+            'env-before-read-docs',
+            lambda app, env, docnames: self.read_docs.extend(docnames))
+        try:
+            self.app.build()
+        finally:
+            self.app.cleanup()
+        return status.getvalue(), warning.getvalue()
+
+
+@pytest.fixture
+def project(tmp_path):
+    return SphinxProject(tmp_path)
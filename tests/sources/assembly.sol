@@ -0,0 +1,29 @@
+pragma solidity ^0.8.0;
+
+/// @title Copies memory with inline assembly
+library MemoryCopy {
+    /// @notice Copies *length* bytes from *src* to *dest*
+    /// @param dest Where to copy to
+    function copy(uint dest, uint src, uint length) internal pure {
+        assembly {
+            for { let i := 0 } lt(i, length) { i := add(i, 32) } {
+                mstore(add(dest, i), mload(add(src, i)))
+            }
+        }
+    }
+
+    /// @notice The size of the code at *account*, with braces in a string
+    function codeSize(address account) internal view returns (uint size) {
+        assembly "evmasm" ("memory-safe") {
+            size := extcodesize(account)
+            if iszero(size) { let s := "}{" }
+        }
+    }
+}
+
+contract UsesAssembly {
+    /// @notice Still found after the assembly blocks
+    function chainId() public view returns (uint id) {
+        assembly { id := chainid() }
+    }
+}
@@ -0,0 +1,32 @@
+pragma solidity ^0.8.0;
+
+/// @notice The larger of *a* and *b*
+function max(uint a, uint b) pure returns (uint) {
+    return a >= b ? a : b;
+}
+
+uint constant LIMIT = 100;
+
+error TooLarge(uint value, uint limit);
+
+/// @notice Rejects values over the limit
+function check(uint value) pure {
+    if (value > LIMIT) {
+        revert TooLarge({value: value, limit: LIMIT});
+    }
+}
+
+/// @title Uses the free functions
+contract Limited {
+    /// @notice The larger of *a* and *b*, if within the limit
+    function clampedMax(uint a, uint b) public pure returns (uint) {
+        uint m = max(a, b);
+        check(m);
+        return m;
+    }
+}
+
+/// @notice A free function after the contract
+function min(uint a, uint b) pure returns (uint) {
+    return a < b ? a : b;
+}
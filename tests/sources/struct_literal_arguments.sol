@@ -0,0 +1,39 @@
+pragma solidity ^0.8.0;
+
+contract Base {
+    struct P {
+        uint a;
+        uint b;
+    }
+
+    constructor(P memory p) {}
+}
+
+/// @title Struct literals in modifier and base constructor arguments
+contract Derived is Base {
+    address owner;
+
+    modifier onlyOwner(uint x) {
+        require(msg.sender == owner);
+        _;
+    }
+
+    /// @notice A base constructor argument with a struct literal
+    constructor() Base(P({a: 1, b: 2})) {
+        owner = msg.sender;
+    }
+
+    function g(P memory p) public pure returns (uint) {
+        return p.a + p.b;
+    }
+
+    /// @notice A modifier argument with a struct literal
+    function f(uint y) public onlyOwner(g(P({a: 1, b: 2}))) returns (uint) {
+        P memory p = P({a: y, b: 2});
+        return g(p);
+    }
+
+    function h() public returns (uint) {
+        return 1;
+    }
+}
@@ -0,0 +1,21 @@
+pragma solidity ^0.8.0;
+
+/// @title A contract with a syntax error between its declarations
+contract Broken {
+    /// @notice The count, missing its semicolon
+    uint public count
+
+    /// @notice Still found after the error
+    function increment() public {
+        count += 1;
+    }
+
+    event Incremented(uint count);
+}
+
+/// @title Parsed as usual after the broken contract
+contract AfterBroken {
+    function answer() public pure returns (uint) {
+        return 42;
+    }
+}
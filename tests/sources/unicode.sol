@@ -0,0 +1,25 @@
+pragma solidity ^0.8.0;
+
+/// @title Grüße — a contract documented in Ünïcödé
+/// @notice Zählt die Besucher 👋
+contract Besucher {
+    /// @notice Anzahl der Besucher, ≥ 0
+    uint public anzahl;
+
+    /// @notice Grüßt den Besucher: „Hallo“
+    function gruessen() public returns (string memory) {
+        anzahl += 1;
+        return unicode"Grüß Gott, 世界";
+    }
+
+    /// @notice Named outside what the grammar accepts for identifiers
+    uint public größe;
+
+    /// @notice Zählt weiter
+    function zaehlen() public view returns (uint) {
+        return anzahl;
+    }
+
+    /// @notice Found after the identifier
+    event Gegruesst(uint anzahl);
+}
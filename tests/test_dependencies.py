@@ -0,0 +1,83 @@
+import hashlib
+
+from sphinxcontrib.soliditydomain.dependencies import ALL_SOURCES
+
+NUM_CONTRACTS = 6
+
+
+def contract_source(name, notice):
+    return '/// @notice {}\ncontract {} {{\n}}\n'.format(notice, name)
+
+
+def contract_doc(name):
+    return ':orphan:\n\n.. autosolcontract:: {}\n'.format(name)
+
+
+def digest(project, name):
+    return hashlib.sha1((project.contracts / name).read_bytes()).hexdigest()
+
+
+def make_contracts(project):
+    for i in range(NUM_CONTRACTS):
+        project.write_source('c{}.sol'.format(i),
+                             contract_source('C{}'.format(i), 'First'))
+        project.write_doc('d{}'.format(i), contract_doc('C{}'.format(i)))
+
+
+def test_changed_source_outdates_only_its_documents(project):
+    make_contracts(project)
+    project.build()
+    assert sorted(project.read_docs) == ['d{}'.format(i) for i in range(
+        NUM_CONTRACTS)] + ['index']
+
+    project.build()
+    assert project.read_docs == []
+
+    project.write_source('c2.sol', contract_source('C2', 'Second'))
+    project.build()
+    assert project.read_docs == ['d2']
+
+
+def test_unresolved_target_outdated_by_any_new_source(project):
+    project.write_doc('missing', contract_doc('Missing'))
+    status, warnings = project.build()
+    assert 'Missing' in warnings
+    assert ALL_SOURCES in project.app.env.sol_dependencies['missing']
+
+    project.write_source('other.sol', contract_source('Other', 'Unrelated'))
+    project.build()
+    assert project.read_docs == ['missing']
+
+    project.write_source('missing.sol', contract_source('Missing', 'Found'))
+    status, warnings = project.build()
+    assert project.read_docs == ['missing']
+    assert 'Missing' not in warnings
+    assert project.app.env.sol_dependencies['missing'] == {
+        'missing.sol': digest(project, 'missing.sol')}
+
+    project.build()
+    assert project.read_docs == []
+
+
+def test_parallel_reads_keep_dependencies(project):
+    make_contracts(project)
+    project.build(parallel=2)
+    expected = {'d{}'.format(i): {'c{}.sol'.format(i): digest(
+        project, 'c{}.sol'.format(i))} for i in range(NUM_CONTRACTS)}
+    assert project.app.env.sol_dependencies == expected
+
+    for i in range(NUM_CONTRACTS):
+        project.write_source('c{}.sol'.format(i),
+                             contract_source('C{}'.format(i), 'Second'))
+    project.remove_doc('d3')
+    project.build(parallel=2)
+    assert sorted(project.read_docs) == [
+        'd{}'.format(i) for i in range(NUM_CONTRACTS) if i != 3]
+    del expected['d3']
+    for docname, dependencies in expected.items():
+        for relsrcpath in dependencies:
+            dependencies[relsrcpath] = digest(project, relsrcpath)
+    assert project.app.env.sol_dependencies == expected
+
+    project.build(parallel=2)
+    assert project.read_docs == []
@@ -0,0 +1,29 @@
+COUNTER = '''pragma solidity ^0.8.0;
+
+/// @title Counts
+contract Counter {
+    /// @notice The count
+    uint public count;
+
+    /// @notice Adds one to the count
+    function increment() public {
+        count += 1;
+    }
+}
+'''
+
+
+def test_bare_exclude_members_excludes_nothing(project):
+    project.write_source('Counter.sol', COUNTER)
+    project.write_doc('index', '''Counter
+=======
+
+.. autosolcontract:: Counter
+    :members:
+    :exclude-members:
+''')
+    status, warnings = project.build('text')
+    assert warnings == ''
+    text = (project.path / '_build' / 'text' / 'index.txt').read_text()
+    assert 'Adds one to the count' in text
+    assert 'The count' in text
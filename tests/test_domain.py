@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+from docutils import nodes
+
+from sphinxcontrib.soliditydomain import domain as domain_module
+from sphinxcontrib.soliditydomain.domain import SolidityDomain, SolObjFullName
+
+TOKEN = SolObjFullName('IToken', (), None)
+MATH = SolObjFullName('Math', (), None)
+TRANSFER = SolObjFullName('transfer', ('IToken',), ('address', 'uint'))
+MAX = SolObjFullName('max', ('Math',), ('uint', 'uint'))
+
+
+def make_domain():
+    return SolidityDomain(SimpleNamespace(domaindata={}))
+
+
+@pytest.fixture
+def domain():
+    domain = make_domain()
+    domain.note_object(TOKEN, 'token', 'interface')
+    domain.note_object(TRANSFER, 'token', 'function')
+    domain.note_object(MATH, 'math', 'library')
+    domain.note_object(MAX, 'math', 'function')
+    return domain
+
+
+def resolve(domain, typ, target):
+    builder = SimpleNamespace(
+        get_relative_uri=lambda fromdocname, docname: docname + '.html')
+    return domain.resolve_xref(
+        None, 'index', builder, typ, target, None, nodes.Text(target))
+
+
+@pytest.mark.parametrize('typ, target, refuri', [
+    ('interface', 'IToken', 'token.html#IToken'),
+    ('lib', 'Math', 'math.html#Math'),
+    ('func', 'transfer', 'token.html#IToken.transfer(address,uint)'),
+    ('func', 'Math.max', 'math.html#Math.max(uint,uint)'),
+    ('lib', 'IToken', None),
+    ('interface', 'Math', None),
+    ('contract', 'IToken', None),
+    ('event', 'transfer', None),
+    ('func', 'IToken', None),
+    ('func', 'missing', None),
+])
+def test_resolve_xref_matches_role_to_objtype(domain, typ, target, refuri):
+    node = resolve(domain, typ, target)
+    if refuri is None:
+        assert node is None
+    else:
+        assert node['refuri'] == refuri
+
+
+def test_clear_doc_removes_objects_from_all_indexes(domain):
+    domain.clear_doc('token')
+    assert domain.data['objects'] == {
+        MATH: ('math', 'library'), MAX: ('math', 'function')}
+    assert domain.data['names'] == {'Math': {MATH: None}, 'max': {MAX: None}}
+    assert domain.data['paths'] == {
+        'Math': {MATH: None}, 'Math.max': {MAX: None}}
+    assert domain.data['docs'] == {'math': {MATH: None, MAX: None}}
+    assert resolve(domain, 'interface', 'IToken') is None
+
+    domain.clear_doc('math')
+    for index in ('objects', 'names', 'paths', 'docs'):
+        assert domain.data[index] == {}
+
+
+def test_merge_domaindata_keeps_first_description(domain, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(domain_module.logger, 'warning',
+                        lambda msg, **kwargs: warnings.append(msg))
+    other = make_domain()
+    other.note_object(TOKEN, 'other', 'interface')
+    other.note_object(SolObjFullName('mint', ('IToken',), ('uint',)),
+                      'other', 'function')
+    other.note_object(MATH, 'skipped', 'library')
+
+    domain.merge_domaindata(['other'], other.data)
+    assert warnings == [
+        'duplicate interface description of {}, other instance in '
+        'token'.format(TOKEN)]
+    assert domain.data['objects'][TOKEN] == ('token', 'interface')
+    assert domain.data['objects'][MATH] == ('math', 'library')
+    assert list(domain.data['docs']['other']) == [
+        SolObjFullName('mint', ('IToken',), ('uint',))]
+    assert resolve(domain, 'interface', 'IToken')['refuri'] == (
+        'token.html#IToken')
+    assert resolve(domain, 'func', 'IToken.mint')['refuri'] == (
+        'other.html#IToken.mint(uint)')
+
+
+def test_duplicate_description_keeps_first(project):
+    project.write_doc('a', ':orphan:\n\n.. sol:contract:: Dup\n')
+    project.write_doc('b', ':orphan:\n\n.. sol:contract:: Dup\n')
+    status, warnings = project.build()
+    assert 'duplicate contract description of' in warnings
+    objects = project.app.env.get_domain('sol').data['objects']
+    assert objects[SolObjFullName('Dup', (), None)] == ('a', 'contract')
@@ -0,0 +1,76 @@
+import random
+import re
+
+import pytest
+
+from sphinxcontrib.soliditydomain.natspec import scan_natspec
+
+# The expression scan_natspec replaced, which it must agree with on
+# anything without @custom tags
+tag_re = re.compile(
+    r''' @ (\w+)
+        \s+
+        ( [^@]+ (?: (?: (?<! \s) @ | @ \s) [^@]+)* )
+    ''',
+    re.VERBOSE | re.MULTILINE | re.DOTALL
+)
+
+adversarial = {
+    'typical': (
+        '@title A simulator for trees\n'
+        '@author Larry A. Gardner\n'
+        '@notice You can use this contract for only the most basic '
+        'simulation\n'
+        '@dev All function calls are currently implemented without side '
+        'effects\n'
+        '@param rings The number of rings from dendrochronological sample\n'
+        '@return age in years, rounded up for partial years\n'),
+    'emails': '@dev contact ' + ' '.join(
+        'user{}@example.com'.format(i) for i in range(2000)),
+    'decorators': '@dev ' + ' '.join('x @ y' for i in range(2000)),
+    'at runs': '@dev a' + '@' * 20000,
+    'word without whitespace': '@' + 'a' * 20000,
+    'failed tag starts': ' '.join('@' + 'a' * 8 for i in range(5000)),
+    'whitespace runs': ''.join('@a' + ' ' * 10 for i in range(2000)),
+    'whitespace before at': '@dev a   @',
+    'at before whitespace': '@dev a @ b @',
+    'double at': '@dev a@@b',
+    'trailing at': '@dev a@',
+    'unicode whitespace': '@dev a @ b\x1c@',
+    'empty': '',
+}
+
+
+def expected_scan(text):
+    return (
+        [(m.group(1), m.group(2), m.start(), m.end())
+         for m in tag_re.finditer(text)],
+        tag_re.sub('', text))
+
+
+def assert_same_as_tag_re(text):
+    tags, untagged = scan_natspec(text)
+    assert ([tuple(tag) for tag in tags], untagged) == expected_scan(text)
+
+
+@pytest.mark.parametrize('name', sorted(adversarial))
+def test_adversarial_inputs_match_tag_re(name):
+    assert_same_as_tag_re(adversarial[name])
+
+
+def test_random_inputs_match_tag_re():
+    alphabet = [
+        '@', '@', ' ', ' ', '\n', '\t', 'a', 'b', '_', '1', ':', '-', 'é',
+        '\x1c', '.', '"', '{', '}', 'dev', 'param', '@return', '  ',
+    ]
+    rng = random.Random(0)
+    for _ in range(20000):
+        assert_same_as_tag_re(''.join(
+            rng.choice(alphabet) for _ in range(rng.randint(0, 30))))
+
+
+def test_custom_tags():
+    tags, untagged = scan_natspec('Text @custom:my-tag some value\n')
+    assert [(tag.name, tag.payload) for tag in tags] == \
+        [('custom:my-tag', 'some value\n')]
+    assert untagged == 'Text '
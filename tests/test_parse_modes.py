@@ -0,0 +1,52 @@
+import glob
+import os
+
+import pytest
+
+from sphinxcontrib.soliditydomain.sourceregistry import parse_sol
+
+here = os.path.dirname(__file__)
+sources = sorted(
+    glob.glob(os.path.join(here, 'sources', '*.sol')) +
+    [os.path.join(here, os.pardir, 'docs', 'example.sol')])
+
+
+@pytest.mark.parametrize('skeleton, tree_free', [
+    (False, True), (True, False), (True, True),
+], ids=['tree_free', 'skeleton', 'skeleton+tree_free'])
+@pytest.mark.parametrize('srcpath', sources, ids=os.path.basename)
+def test_parse_modes_record_same_definitions(srcpath, skeleton, tree_free):
+    full = parse_sol(srcpath, 'test.sol')
+    result = parse_sol(srcpath, 'test.sol', skeleton=skeleton,
+                       tree_free=tree_free)
+    assert result.records == full.records
+    assert result.warnings == full.warnings
+
+
+@pytest.mark.parametrize('tree_free', [False, True])
+def test_skeleton_parse_skips_syntax_errors_in_bodies(tree_free):
+    content = (b'contract C {\n'
+               b'    function f() public {\n'
+               b'        uint x = ;\n'
+               b'    }\n'
+               b'    function g() public {}\n'
+               b'}\n')
+    full = parse_sol('body.sol', 'body.sol', tree_free=tree_free,
+                     content=content)
+    skeleton = parse_sol('body.sol', 'body.sol', skeleton=True,
+                         tree_free=tree_free, content=content)
+    assert skeleton.records == full.records
+    assert len(full.warnings) == 1
+    assert full.warnings[0].startswith(
+        "body.sol: line 3:17 mismatched input ';'")
+    assert skeleton.warnings == []
+
+
+def test_struct_literal_arguments_are_not_bodies():
+    srcpath = os.path.join(here, 'sources', 'struct_literal_arguments.sol')
+    signatures = [
+        record[2] for record in parse_sol(
+            srcpath, 'test.sol', skeleton=True).records]
+    assert '() Base(P ( {a:1,b:2} ))' in signatures
+    assert ('f(uint y) public onlyOwner(g ( P({a:1,b:2}) )) '
+            'returns (uint)') in signatures
@@ -0,0 +1,85 @@
+import pytest
+
+from sphinxcontrib.soliditydomain.registry import RECORD_FIELDS, create_registry
+
+RECORDS = [
+    ('contract', 'b.sol', 'Vault', 'Vault', None, None, 'Holds funds'),
+    ('constructor', 'b.sol', '()', None, '', 'Vault', ''),
+    ('function', 'b.sol', 'withdraw(uint amount) external', 'withdraw',
+     'uint', 'Vault', 'Withdraws *amount*'),
+    ('function', 'b.sol', 'withdraw() external', 'withdraw', '', 'Vault', ''),
+    ('function', 'b.sol', 'fallback() external', None, '', 'Vault', ''),
+    ('contract', 'a.sol', 'Bank', 'Bank', None, None, ''),
+    ('function', 'a.sol', 'withdraw(uint amount) external', 'withdraw',
+     'uint', 'Bank', ''),
+    ('event', 'a.sol', 'Withdrawn(uint amount)', 'Withdrawn', 'uint', 'Bank',
+     ''),
+    ('function', 'a.sol', 'helper(uint x) pure', 'helper', 'uint', None, ''),
+    ('function', 'c.sol', 'withdraw(uint amount) external', 'withdraw',
+     'uint', 'Vault', 'Another Vault'),
+]
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def registry(request, tmp_path):
+    if request.param == 'sqlite':
+        pytest.importorskip('peewee')
+    registry = create_registry(request.param, str(tmp_path))
+    yield registry
+    registry.close()
+
+
+def fields(objs):
+    return [tuple(getattr(obj, name) for name in RECORD_FIELDS)
+            for obj in objs]
+
+
+def test_add_returns_number_of_objects(registry):
+    assert registry.add(RECORDS) == len(RECORDS)
+
+
+@pytest.mark.parametrize('criteria, expected', [
+    (dict(objtype='function', name='withdraw'), [2, 3, 6, 9]),
+    (dict(objtype='function', name='withdraw', file='b.sol'), [2, 3]),
+    (dict(objtype='function', name='withdraw', contract_name='Vault'),
+     [2, 3, 9]),
+    (dict(objtype='function', name='withdraw', paramtypes='uint'), [2, 6, 9]),
+    (dict(objtype='function', name='withdraw', file='b.sol',
+          contract_name='Vault', paramtypes='uint'), [2]),
+    (dict(objtype='contract', name='Bank'), [5]),
+    (dict(objtype='contract', name='withdraw'), []),
+    (dict(objtype='constructor', name=None, contract_name='Vault'), [1]),
+    (dict(objtype='function', name=None), [4]),
+    (dict(objtype='function', name='helper', file='a.sol'), [8]),
+])
+def test_find(registry, criteria, expected):
+    registry.add(RECORDS)
+    assert fields(registry.find(**criteria)) == [RECORDS[i] for i in expected]
+
+
+@pytest.mark.parametrize('file, contract_name, expected', [
+    ('b.sol', 'Vault', [1, 2, 3, 4]),
+    ('a.sol', 'Bank', [6, 7]),
+    ('a.sol', None, [5, 8]),
+    ('c.sol', 'Vault', [9]),
+    ('a.sol', 'Vault', []),
+])
+def test_members(registry, file, contract_name, expected):
+    registry.add(RECORDS)
+    assert fields(registry.members(file, contract_name)) == [
+        RECORDS[i] for i in expected]
+
+
+def test_remove_file(registry):
+    registry.add(RECORDS)
+    registry.remove_file('b.sol')
+    assert fields(registry.find('function', 'withdraw')) == [
+        RECORDS[6], RECORDS[9]]
+    assert registry.members('b.sol', 'Vault') == []
+    assert registry.find('contract', 'Vault') == ()
+
+    # objects added again come after the ones kept
+    registry.add(RECORDS[:5])
+    assert fields(registry.find('function', 'withdraw')) == [
+        RECORDS[i] for i in (6, 9, 2, 3)]
+    assert fields(registry.members('b.sol', 'Vault')) == RECORDS[1:5]
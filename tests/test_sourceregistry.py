@@ -0,0 +1,45 @@
+import os
+
+from sphinxcontrib.soliditydomain.sourceregistry import parse_sol
+
+here = os.path.dirname(__file__)
+
+
+def test_syntax_errors_are_warnings_of_the_source(capfd):
+    srcpath = os.path.join(here, 'sources', 'syntax_error.sol')
+    result = parse_sol(srcpath, 'contracts/syntax_error.sol')
+    assert result.warnings == [
+        "contracts/syntax_error.sol: line 9:4 mismatched input 'function' "
+        "expecting {';', '='}"]
+    assert result.ll_fallback
+    assert capfd.readouterr().err == ''
+
+
+def test_lexer_errors_are_warnings_of_the_source(tmp_path, capfd):
+    srcpath = tmp_path / 'stray.sol'
+    srcpath.write_text('contract Stray {\n    uint # x;\n}\n')
+    result = parse_sol(str(srcpath), 'stray.sol')
+    assert result.warnings[0] == (
+        "stray.sol: line 2:9 token recognition error at: '#'")
+    assert capfd.readouterr().err == ''
+
+
+def test_parse_cache_replays_warnings(project):
+    with open(os.path.join(here, 'sources', 'syntax_error.sol')) as f:
+        project.write_source('syntax_error.sol', f.read())
+    expected = ("syntax_error.sol: line 9:4 mismatched input 'function' "
+                "expecting {';', '='}")
+
+    status, warnings = project.build()
+    assert 'loaded 0 of 1 Solidity sources from parse cache' in status
+    assert expected in warnings
+
+    status, warnings = project.build()
+    assert 'loaded 1 of 1 Solidity sources from parse cache' in status
+    assert expected in warnings
+
+
+def test_parse_given_content():
+    result = parse_sol('missing.sol', 'missing.sol',
+                       content=b'contract Given {}\n')
+    assert [record[3] for record in result.records] == ['Given']
@@ -0,0 +1,116 @@
+import hashlib
+import time
+
+import pytest
+
+from sphinxcontrib.soliditydomain import watcher as watcher_module
+from sphinxcontrib.soliditydomain.watcher import SourceWatcher
+
+COUNTER = 'contract Counter {{\n    function {}() public {{}}\n}}\n'
+
+
+def digest(content):
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def make_watcher(tmp_path, monkeypatch):
+    # without inotify, the watcher falls back to polling
+    monkeypatch.setattr(watcher_module, 'load_libc', lambda: None)
+    watchers = []
+
+    def make_watcher(**kwargs):
+        kwargs.setdefault('poll_interval', 0.02)
+        watcher = SourceWatcher(str(tmp_path), {}, **kwargs)
+        watchers.append(watcher)
+        assert watcher.kind == 'polling'
+        return watcher
+
+    yield make_watcher
+    for watcher in watchers:
+        watcher.stop()
+
+
+def test_flush_processes_changes_without_waiting(tmp_path, make_watcher):
+    watcher = make_watcher(debounce=60)
+    content = COUNTER.format('increment')
+    (tmp_path / 'Counter.sol').write_text(content)
+
+    started = time.monotonic()
+    sources, results = watcher.take_changes()
+    assert time.monotonic() - started < 30
+    assert sources == [(str(tmp_path / 'Counter.sol'), 'Counter.sol')]
+    result = results['Counter.sol']
+    assert result.digest == digest(content)
+    assert result.summary.contracts == ['Counter']
+    assert [record[3] for record in result.records] == [
+        'Counter', 'increment']
+
+    # nothing changed since
+    assert watcher.take_changes() == (sources, {})
+
+
+def test_changes_are_debounced(tmp_path, make_watcher):
+    watcher = make_watcher(debounce=1.0)
+    for name in ('increment', 'decrement', 'reset'):
+        content = COUNTER.format(name)
+        (tmp_path / 'Counter.sol').write_text(content)
+        time.sleep(0.05)
+    # still settling, so not processed yet
+    with watcher.lock:
+        assert watcher.results == {}
+
+    wait_for(lambda: watcher.results)
+    with watcher.lock:
+        result = watcher.results['Counter.sol']
+    assert result.digest == digest(content)
+    assert [record[3] for record in result.records] == ['Counter', 'reset']
+
+
+def test_deleted_and_renamed_sources(tmp_path, make_watcher):
+    (tmp_path / 'a.sol').write_text(COUNTER.format('a'))
+    (tmp_path / 'b.sol').write_text(COUNTER.format('b'))
+    watcher = make_watcher(debounce=0.05)
+
+    (tmp_path / 'a.sol').unlink()
+    (tmp_path / 'b.sol').rename(tmp_path / 'c.sol')
+    sources, results = watcher.take_changes()
+    assert sources == [(str(tmp_path / 'c.sol'), 'c.sol')]
+    assert results['a.sol'] is None
+    assert results['b.sol'] is None
+    assert results['c.sol'].digest == digest(COUNTER.format('b'))
+
+
+def test_only_prescans_without_parsing(tmp_path, make_watcher):
+    watcher = make_watcher(parse=False)
+    (tmp_path / 'Counter.sol').write_text(COUNTER.format('increment'))
+    sources, results = watcher.take_changes()
+    assert results['Counter.sol'].records is None
+    assert results['Counter.sol'].summary.contracts == ['Counter']
+
+
+def test_parses_the_content_read(tmp_path, make_watcher, monkeypatch):
+    watcher = make_watcher()
+    prescan_sol = watcher_module.prescan_sol
+
+    def prescan_and_rewrite(content, relsrcpath):
+        # the file changes again after it was first read
+        if b'increment' in content:
+            (tmp_path / 'Counter.sol').write_text(COUNTER.format('later'))
+        return prescan_sol(content, relsrcpath)
+
+    monkeypatch.setattr(watcher_module, 'prescan_sol', prescan_and_rewrite)
+    content = COUNTER.format('increment')
+    (tmp_path / 'Counter.sol').write_text(content)
+    sources, results = watcher.take_changes()
+    result = results['Counter.sol']
+    assert result.digest == digest(content)
+    assert [record[3] for record in result.records] == [
+        'Counter', 'increment']